@@ -8,6 +8,13 @@ from docx.oxml.table import CT_Tbl
 from docx.table import _Cell, Table
 from docx.text.paragraph import Paragraph
 
+try:
+    from .seenset import record_used
+    from .tablegrid import TableGrid
+except ImportError:
+    from seenset import record_used
+    from tablegrid import TableGrid
+
 # Re-use iteration logic to ensure ID alignment
 def iter_block_items(parent):
     if isinstance(parent, _Document):
@@ -25,7 +32,13 @@ def iter_block_items(parent):
         elif isinstance(child, CT_Tbl):
             yield Table(child, parent)
 
-def build_doc(template_path, content_json_path, output_path):
+def build_doc(template_path, content_json_path, output_path, student=None):
+    """
+    按 content.json 填充模板并保存
+
+    student 不为空时，文档保存后把实际插入的内容记入该学员的已用题目集合，
+    之后 searcher 为同一学员搜索时会跳过这些题目。
+    """
     print(f"Loading template: {template_path}")
     
     # 检查模板文件是否存在
@@ -67,6 +80,9 @@ def build_doc(template_path, content_json_path, output_path):
     
     import re
     
+    # 实际写入文档的文本（用于记录学员已用过的题目）
+    inserted = []
+    
     for block in iter_block_items(doc):
         # Handle Table
         if isinstance(block, Table):
@@ -85,11 +101,16 @@ def build_doc(template_path, content_json_path, output_path):
                     # Smart fill: Try to fill 2nd column (index 1) of each row?
                     # Or just fill sequentially?
                     # Let's assume data is a list matching rows.
+                    # The grid is scanned once; filling a cell only replaces its content,
+                    # so the merged-cell layout stays valid for the following rows.
+                    grid = TableGrid(block._tbl)
                     for i, text in enumerate(data):
-                        if i < len(block.rows):
+                        if i < len(grid):
                             # Try to write to Col 1, else Col 0
-                            target_cell_idx = 1 if len(block.rows[i].cells) > 1 else 0
-                            block.rows[i].cells[target_cell_idx].text = str(text)
+                            row_cells = grid.row_cells(i)
+                            target_cell_idx = 1 if len(row_cells) > 1 else 0
+                            _Cell(row_cells[target_cell_idx], block).text = str(text)
+                            inserted.append(str(text))
             continue
             
         # Handle Paragraph
@@ -119,23 +140,39 @@ def build_doc(template_path, content_json_path, output_path):
                 if p_id in content_map:
                     # Update text
                     block.text = str(content_map[p_id])
+                    inserted.append(str(content_map[p_id]))
 
     doc.save(output_path)
     print(f"Generated doc saved to {output_path}")
+    
+    if student:
+        added = record_used(student, inserted)
+        print(f"Recorded {added} new question fingerprints for student: {student}")
 
 if __name__ == "__main__":
-    if len(sys.argv) < 4:
-        print("Usage: python builder.py <template_docx> <content.json> <output_docx>")
+    args = sys.argv[1:]
+    student = None
+    if "--student" in args:
+        i = args.index("--student")
+        if i + 1 >= len(args):
+            print("❌ --student 需要指定学员标识")
+            sys.exit(1)
+        student = args[i + 1]
+        del args[i:i + 2]
+    
+    if len(args) < 3:
+        print("Usage: python builder.py <template_docx> <content.json> <output_docx> [--student <name>]")
         print("\n示例:")
         print("  python builder.py /path/to/template.docx /path/to/content.json /path/to/output.docx")
+        print("  python builder.py template.docx content.json lesson_03.docx --student zhangsan  # 记录该学员已用过的题目")
         sys.exit(1)
         
-    tpl = sys.argv[1]
-    content = sys.argv[2]
-    out = sys.argv[3]
+    tpl = args[0]
+    content = args[1]
+    out = args[2]
     
     try:
-        build_doc(tpl, content, out)
+        build_doc(tpl, content, out, student=student)
         print("\n✅ 文档生成成功!")
     except FileNotFoundError as e:
         print(f"\n{e}")
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Columnar Index for Question Bank
+紧凑的列式二进制索引（index.qbc），通过 mmap 直接在数组上筛选，不构建逐文件的字典
+
+文件布局:
+    magic(4) | version(u32) | header_len(u32) | header JSON | 按8字节对齐的数据区
+
+header 中记录元数据、各分面列的取值字典和每个数据列的位置。数据区包含：
+    - year/district/exam_type/question_type: 字典编码（uint16）
+    - id、size_kb、size_bytes、year_num: int64；mtime: float64
+    - rank_order/rank: 预先按 (年份, 文件大小) 降序排好的行号及每行的名次
+    - text: 预先小写化的 "文件名\\0预览\\0" UTF-8 文本块及其偏移表
+    - record: 每个索引项的原始 JSON 及其偏移表，只在返回结果时解码
+数组按本机字节序写入，header 中记录 byteorder，不一致时拒绝加载。
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+MAGIC = b"QBCI"
+FORMAT_VERSION = 2
+PREAMBLE = struct.Struct("<4sII")
+
+FACETS = ("year", "district", "exam_type", "question_type")
+
+# 文本块中的字段分隔符：关键词不可能跨越 NUL 匹配
+TEXT_SEP = "\x00"
+
+def _align(n, alignment=8):
+    return (n + alignment - 1) // alignment * alignment
+
+def _year_number(year):
+    return int(year) if year.isdigit() else 0
+
+def write_columnar_index(path, index_data):
+    """
+    将索引写入列式二进制文件
+
+    先写临时文件再原子替换，已经 mmap 旧文件的进程不受影响。
+
+    Args:
+        path: 输出文件路径
+        index_data: 与 index.json 相同结构的索引数据
+    """
+    files = index_data.get("files", [])
+
+    dictionaries = {
+        facet: sorted({item.get(facet, "") for item in files})
+        for facet in FACETS
+    }
+    columns = {}
+    for facet in FACETS:
+        codes = {value: code for code, value in enumerate(dictionaries[facet])}
+        columns[facet] = array('H', (codes[item.get(facet, "")] for item in files))
+
+    columns["id"] = array('q', (item["id"] for item in files))
+    columns["size_kb"] = array('q', (item.get("size_kb", 999999) for item in files))
+    columns["size_bytes"] = array('q', (item.get("size_bytes", -1) for item in files))
+    columns["mtime"] = array('d', (item.get("mtime", 0.0) for item in files))
+    columns["year_num"] = array('q', (_year_number(item.get("year", "0")) for item in files))
+
+    # 排名顺序：与 QuestionBankSearcher.search 相同的稳定降序
+    keys = list(zip(columns["year_num"], columns["size_kb"]))
+    rank_order = sorted(range(len(files)), key=keys.__getitem__, reverse=True)
+    rank = [0] * len(files)
+    for r, row in enumerate(rank_order):
+        rank[row] = r
+    columns["rank_order"] = array('q', rank_order)
+    columns["rank"] = array('q', rank)
+
+    text_blob = bytearray()
+    text_offsets = array('Q', [0])
+    record_blob = bytearray()
+    record_offsets = array('Q', [0])
+    for item in files:
+        text = (item.get("filename", "").lower() + TEXT_SEP
+                + item.get("preview", "").lower() + TEXT_SEP)
+        text_blob += text.encode("utf-8")
+        text_offsets.append(len(text_blob))
+        record_blob += json.dumps(item, ensure_ascii=False).encode("utf-8")
+        record_offsets.append(len(record_blob))
+    columns["text_offsets"] = text_offsets
+    columns["record_offsets"] = record_offsets
+
+    # 数据区各段相对数据区起点的位置
+    sections = []
+    layout = {}
+    offset = 0
+    for name, col in columns.items():
+        raw = col.tobytes()
+        layout[name] = [offset, col.typecode, len(raw)]
+        sections.append((offset, raw))
+        offset = _align(offset + len(raw))
+    for name, blob in (("text", text_blob), ("record", record_blob)):
+        layout[name] = [offset, "B", len(blob)]
+        sections.append((offset, bytes(blob)))
+        offset = _align(offset + len(blob))
+
+    header = json.dumps({
+        "metadata": index_data.get("metadata", {}),
+        "rows": len(files),
+        "byteorder": sys.byteorder,
+        "dictionaries": dictionaries,
+        "layout": layout
+    }, ensure_ascii=False).encode("utf-8")
+    data_start = _align(PREAMBLE.size + len(header))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for section_offset, raw in sections:
+            f.seek(data_start + section_offset)
+            f.write(raw)
+    os.replace(tmp_path, path)
+
+class ColumnarIndex:
+    """mmap 方式打开的列式索引，筛选和关键词匹配直接在映射内存上进行"""
+
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"列式索引不存在: {path}\n"
+                "请先运行: python scripts/indexer.py --columnar"
+            )
+
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_len = PREAMBLE.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"列式索引格式不匹配: {path}，请重新运行 indexer.py --columnar")
+        header = json.loads(self.mm[PREAMBLE.size:PREAMBLE.size + header_len])
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"列式索引字节序与本机不一致: {path}，请在本机重新生成")
+
+        self.path = path
+        self.metadata = header["metadata"]
+        self.rows = header["rows"]
+        self.dictionaries = header["dictionaries"]
+        self.codes = {
+            facet: {value: code for code, value in enumerate(values)}
+            for facet, values in self.dictionaries.items()
+        }
+        self.facet_counts = None
+
+        data_start = _align(PREAMBLE.size + header_len)
+        self.view = view = memoryview(self.mm)
+        self.columns = {}
+        self.sections = {}
+        for name, (offset, typecode, nbytes) in header["layout"].items():
+            start = data_start + offset
+            if typecode == "B":
+                self.sections[name] = (start, start + nbytes)
+            else:
+                self.columns[name] = view[start:start + nbytes].cast(typecode)
+
+    def close(self):
+        # 先释放列视图，mmap 才能关闭
+        for column in self.columns.values():
+            column.release()
+        self.columns.clear()
+        self.view.release()
+        self.mm.close()
+
+    def record(self, row):
+        """解码第 row 行的完整索引项"""
+        offsets = self.columns["record_offsets"]
+        start = self.sections["record"][0]
+        return json.loads(self.mm[start + offsets[row]:start + offsets[row + 1]])
+
+    def keyword_rows(self, keyword):
+        """
+        按行号升序产出文件名或预览包含关键词（忽略大小写）的行
+
+        在整个文本块上用 mmap.find 查找，命中后通过偏移表定位行号并跳到下一行继续。
+        """
+        needle = keyword.lower().encode("utf-8")
+        if TEXT_SEP.encode() in needle:
+            return
+        offsets = self.columns["text_offsets"]
+        start, end = self.sections["text"]
+        pos = self.mm.find(needle, start, end)
+        while pos != -1:
+            row = bisect_right(offsets, pos - start) - 1
+            yield row
+            pos = self.mm.find(needle, start + offsets[row + 1], end)
+
+    def search(self, keyword=None, year=None, district=None, exam_type=None,
+               question_type=None, limit=10):
+        """
+        搜索索引，语义和排序与 QuestionBankSearcher.search 相同
+
+        Returns:
+            匹配的索引项列表（只为返回的结果解码字典）
+        """
+        filters = []
+        for facet, value in (("year", year), ("district", district),
+                             ("exam_type", exam_type), ("question_type", question_type)):
+            if value:
+                code = self.codes[facet].get(value)
+                if code is None:
+                    return []
+                filters.append((self.columns[facet], code))
+
+        if limit <= 0:
+            return []
+
+        if keyword:
+            # 关键词命中行需要全部找出，再按名次取前 limit 个
+            matches = (
+                row for row in self.keyword_rows(keyword)
+                if all(column[row] == code for column, code in filters)
+            )
+            top = heapq.nsmallest(limit, matches, key=self.columns["rank"].__getitem__)
+        else:
+            # 按预排好的名次扫描，凑够 limit 条即停止
+            top = []
+            for row in self.columns["rank_order"]:
+                if all(column[row] == code for column, code in filters):
+                    top.append(row)
+                    if len(top) >= limit:
+                        break
+        return [self.record(row) for row in top]
+
+    def items_by_id(self, file_ids):
+        """按 id 取回索引项 {id: 索引项}（索引按 id 升序写入，用二分查找定位行）"""
+        ids = self.columns["id"]
+        result = {}
+        for file_id in file_ids:
+            row = bisect_left(ids, file_id)
+            if row < self.rows and ids[row] == file_id:
+                result[file_id] = self.record(row)
+        return result
+
+    def facets(self):
+        """各分面取值的文件数 {分面: {取值: 文件数}}（首次调用时统计一次）"""
+        if self.facet_counts is None:
+            self.facet_counts = {}
+            for facet in FACETS:
+                counts = Counter(self.columns[facet])
+                values = self.dictionaries[facet]
+                self.facet_counts[facet] = {
+                    values[code]: counts[code] for code in range(len(values)) if counts[code]
+                }
+        return self.facet_counts
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Detection for Question Bank
+MinHash 签名 + LSH 分段索引（minhash.json），找出内容几乎相同的试卷
+（各区模拟卷中重复使用的阅读篇目、答案版副本、重复上传的文件等）
+
+- 文档文本去掉空白后切成 SHINGLE_SIZE 个字符的片段，用 crc32 哈希
+- NUM_PERM 个随机线性哈希 (a*x + b) mod p 的最小值组成签名，
+  两个签名中相同位置相等的比例即 Jaccard 相似度的估计
+- 签名分为 BANDS 段，任一段完全相同的文档才作为候选对，再用签名估计相似度
+- 有预切分的题目时（--questions）再对每道题目（阅读篇目等）计算签名并分组，
+  找出在不同试卷之间重复使用的题目：试卷整体不相似、只共用一篇阅读时也能识别。
+  题目签名只保留低 32 位，压缩后存放在 question_minhash.json（仅供增量索引沿用），
+  minhash.json 中只保存题目重复组（题目文本指纹），搜索时据此跳过已选来源中出现过的题目
+"""
+
+import os
+import re
+import json
+import zlib
+import array
+import base64
+import random
+
+try:
+    from .seenset import fingerprint
+except ImportError:
+    from seenset import fingerprint
+
+FORMAT_VERSION = 1
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+
+# 估计 Jaccard 相似度不低于此值视为重复
+DUPLICATE_THRESHOLD = 0.8
+
+# 去掉空白后短于此长度的题目（选项行、空白填空等）不参与题目级重复检测
+QUESTION_MIN_CHARS = 30
+
+MERSENNE_PRIME = (1 << 61) - 1
+SEED = 20240901
+
+_rng = random.Random(SEED)
+PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+WHITESPACE = re.compile(r'\s+')
+
+def shingle_hashes(text):
+    """去掉空白、转小写后的字符片段哈希集合"""
+    text = WHITESPACE.sub("", text.lower())
+    if len(text) < SHINGLE_SIZE:
+        return {zlib.crc32(text.encode("utf-8"))} if text else set()
+    return {
+        zlib.crc32(text[i:i + SHINGLE_SIZE].encode("utf-8"))
+        for i in range(len(text) - SHINGLE_SIZE + 1)
+    }
+
+def minhash_signature(text):
+    """
+    计算文本的 MinHash 签名
+
+    Returns:
+        NUM_PERM 个整数的列表；文本为空时返回 None
+    """
+    hashes = shingle_hashes(text)
+    if not hashes:
+        return None
+    return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in PERMUTATIONS]
+
+def estimate_similarity(sig_a, sig_b):
+    """两个签名估计的 Jaccard 相似度"""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERM
+
+def band_keys(signature):
+    """签名的各段键 (段号, 段内取值)"""
+    return [
+        (band, tuple(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]))
+        for band in range(BANDS)
+    ]
+
+def build_buckets(signatures):
+    """LSH 分桶 {段键: [文件 id]}"""
+    buckets = {}
+    for file_id, signature in signatures.items():
+        for key in band_keys(signature):
+            buckets.setdefault(key, []).append(file_id)
+    return buckets
+
+def duplicate_groups(signatures, threshold=DUPLICATE_THRESHOLD):
+    """
+    把重复文档合并成组
+
+    按 id 顺序处理，每个文件归入与它相似度最高且达到 threshold 的组中心所在的组，
+    否则自己成为新组的中心。只和组中心比较，避免相似关系沿链条传递、
+    把渐变的一串文档合并成一个大组。
+
+    Args:
+        signatures: {文件 id: 签名}
+
+    Returns:
+        重复组列表，每组为升序的文件 id 列表，第一个为组中心（只包含两个及以上文件的组）
+    """
+    center_buckets = {}
+    members = {}
+    for file_id in sorted(signatures):
+        signature = signatures[file_id]
+        keys = band_keys(signature)
+
+        candidates = set()
+        for key in keys:
+            candidates.update(center_buckets.get(key, ()))
+        best = None
+        best_similarity = threshold
+        for center in sorted(candidates):
+            similarity = estimate_similarity(signature, signatures[center])
+            if similarity >= best_similarity and (best is None or similarity > best_similarity):
+                best, best_similarity = center, similarity
+
+        if best is None:
+            members[file_id] = [file_id]
+            for key in keys:
+                center_buckets.setdefault(key, []).append(file_id)
+        else:
+            members[best].append(file_id)
+
+    return [ids for _, ids in sorted(members.items()) if len(ids) > 1]
+
+def question_signature(text):
+    """
+    题目的 MinHash 签名（各值取低 32 位，便于紧凑保存）
+
+    Returns:
+        NUM_PERM 个整数的列表；题目过短时返回 None
+    """
+    if len(WHITESPACE.sub("", text)) < QUESTION_MIN_CHARS:
+        return None
+    signature = minhash_signature(text)
+    return [value & 0xFFFFFFFF for value in signature] if signature else None
+
+def question_key(text):
+    """题目文本指纹（与已用题目集合相同的归一化），搜索时据此查找题目所在的重复组"""
+    return fingerprint(text).hex()[:16]
+
+def pack_signature(signature):
+    """32 位签名 -> base64 文本"""
+    return base64.b64encode(array.array("I", signature).tobytes()).decode("ascii")
+
+def unpack_signature(packed):
+    values = array.array("I")
+    values.frombytes(base64.b64decode(packed))
+    return values.tolist()
+
+def question_duplicate_groups(question_signatures, questions_by_id, threshold=DUPLICATE_THRESHOLD):
+    """
+    找出在不同试卷之间重复出现的题目
+
+    Args:
+        question_signatures: {文件 id: 与题目一一对应的签名列表（过短的题目为 None）}
+        questions_by_id: {文件 id: 题目文本列表}
+
+    Returns:
+        重复组列表，每组为 [[文件 id, 题目指纹], ...]，第一项为组中心；
+        只包含出现在两份及以上试卷中的组
+    """
+    signatures = {}
+    for file_id, file_signatures in question_signatures.items():
+        for position, signature in enumerate(file_signatures):
+            if signature is not None:
+                signatures[(file_id, position)] = signature
+
+    groups = []
+    for members in duplicate_groups(signatures, threshold):
+        if len({file_id for file_id, _ in members}) < 2:
+            continue
+        group = []
+        for file_id, position in members:
+            member = [file_id, question_key(questions_by_id[file_id][position])]
+            if member not in group:
+                group.append(member)
+        groups.append(group)
+    return groups
+
+def write_question_signatures(path, index_metadata, question_signatures, files):
+    """
+    保存各试卷的题目签名（供增量索引沿用，搜索时不读取）
+
+    Args:
+        path: 输出文件路径
+        index_metadata: index.json 的 metadata
+        question_signatures: {文件 id: 签名列表（过短的题目为 None）}
+        files: {文件 id: 文件路径}
+    """
+    data = {
+        "metadata": {
+            "version": FORMAT_VERSION,
+            "index_created_at": index_metadata.get("created_at"),
+            "num_perm": NUM_PERM,
+        },
+        "files": {str(file_id): files.get(file_id) for file_id in question_signatures},
+        "questions": {
+            str(file_id): [pack_signature(sig) if sig is not None else None for sig in sigs]
+            for file_id, sigs in question_signatures.items()
+        },
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+def load_question_signatures(path, index_metadata=None):
+    """
+    读取已有的题目签名（用于增量索引，校验方式与 load_signatures 相同）
+
+    Returns:
+        {文件 id: (文件路径, 签名列表)}；文件不存在、损坏或与索引不一致时返回空字典
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    meta = data.get("metadata", {})
+    if meta.get("version") != FORMAT_VERSION:
+        return {}
+    if index_metadata is not None and meta.get("index_created_at") != index_metadata.get("created_at"):
+        return {}
+    files = data.get("files", {})
+    return {
+        int(file_id): (files.get(file_id), [unpack_signature(s) if s is not None else None for s in sigs])
+        for file_id, sigs in data.get("questions", {}).items()
+    }
+
+def write_minhash_index(path, index_metadata, signatures, files=None, question_groups=None):
+    """
+    保存 MinHash 签名和重复组，记录对应 index.json 的创建时间用于一致性校验
+
+    Args:
+        path: 输出文件路径
+        index_metadata: index.json 的 metadata
+        signatures: {文件 id: 签名}（文本为空的文件不包含在内）
+        files: {文件 id: 文件路径}，随签名保存，增量索引据此确认 id 仍对应同一文件
+        question_groups: 题目重复组（见 question_duplicate_groups）
+
+    Returns:
+        重复组列表
+    """
+    groups = duplicate_groups(signatures)
+    files = files or {}
+    data = {
+        "metadata": {
+            "version": FORMAT_VERSION,
+            "index_created_at": index_metadata.get("created_at"),
+            "num_perm": NUM_PERM,
+            "bands": BANDS,
+            "threshold": DUPLICATE_THRESHOLD,
+        },
+        "signatures": {str(file_id): sig for file_id, sig in signatures.items()},
+        "files": {str(file_id): files[file_id] for file_id in signatures if file_id in files},
+        "groups": groups,
+        "question_groups": question_groups or [],
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return groups
+
+def load_signatures(path, index_metadata=None):
+    """
+    读取已有的签名（用于增量索引）
+
+    index_metadata 为已有 index.json 的 metadata：签名不是与它同批生成时
+    （中间有不带 --dedup 的全量重建，id 已重新编号）视为没有可沿用的签名。
+
+    Returns:
+        {文件 id: (文件路径, 签名)}，旧格式没有记录路径时路径为 None；
+        文件不存在、损坏或与索引不一致时返回空字典
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    meta = data.get("metadata", {})
+    if meta.get("version") != FORMAT_VERSION:
+        return {}
+    if index_metadata is not None and meta.get("index_created_at") != index_metadata.get("created_at"):
+        return {}
+    files = data.get("files", {})
+    return {
+        int(file_id): (files.get(file_id), sig)
+        for file_id, sig in data.get("signatures", {}).items()
+    }
+
+class MinHashIndex:
+    """重复组查询和"相似文档"查找"""
+
+    def __init__(self, signatures, groups, question_groups=None):
+        self.signatures = signatures
+        self.groups = groups
+        self.group_of = {file_id: i for i, ids in enumerate(groups) for file_id in ids}
+        self.buckets = None
+
+        self.question_groups = question_groups or []
+        self.question_group_of = {}
+        self.file_question_groups = {}
+        for i, members in enumerate(self.question_groups):
+            for file_id, key in members:
+                self.question_group_of.setdefault(key, i)
+                self.file_question_groups.setdefault(file_id, set()).add(i)
+
+    @classmethod
+    def load(cls, path, index_metadata=None):
+        """
+        加载 MinHash 索引
+
+        Returns:
+            MinHashIndex；文件不存在、版本不符或与 index.json 不一致时返回 None
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        meta = data.get("metadata", {})
+        if meta.get("version") != FORMAT_VERSION:
+            return None
+        if index_metadata is not None and meta.get("index_created_at") != index_metadata.get("created_at"):
+            return None
+        signatures = {int(file_id): sig for file_id, sig in data.get("signatures", {}).items()}
+        return cls(signatures, data.get("groups", []), data.get("question_groups", []))
+
+    def duplicate_key(self, file_id):
+        """重复组标识：同组文件相同，不属于任何组的文件返回自身 id"""
+        group = self.group_of.get(file_id)
+        return ("group", group) if group is not None else ("file", file_id)
+
+    def canonical_of(self, file_id):
+        """文件所在重复组的规范来源（组中心，即组内第一个 id）；不属于任何组时返回自身"""
+        group = self.group_of.get(file_id)
+        return self.groups[group][0] if group is not None else file_id
+
+    def duplicates_of(self, file_id):
+        """与该文件同组的其他文件 id"""
+        group = self.group_of.get(file_id)
+        if group is None:
+            return []
+        return [other for other in self.groups[group] if other != file_id]
+
+    def similar(self, file_id, limit=10, min_similarity=0.0):
+        """
+        通过 LSH 分桶查找相似文件
+
+        Returns:
+            [(文件 id, 估计相似度)]，按相似度降序；没有签名的文件返回空列表
+        """
+        signature = self.signatures.get(file_id)
+        if signature is None:
+            return []
+        if self.buckets is None:
+            self.buckets = build_buckets(self.signatures)
+
+        candidates = set()
+        for key in band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+        candidates.discard(file_id)
+
+        scored = [
+            (other, estimate_similarity(signature, self.signatures[other]))
+            for other in candidates
+        ]
+        scored = [(other, sim) for other, sim in scored if sim >= min_similarity]
+        scored.sort(key=lambda pair: (-pair[1], pair[0]))
+        return scored[:limit]
+
+    def question_group(self, text):
+        """题目所在的题目重复组编号；不在任何组中时返回 None"""
+        if not self.question_group_of:
+            return None
+        return self.question_group_of.get(question_key(text))
+
+    def sharing_questions(self, file_id, limit=10):
+        """
+        与该文件共用重复题目（如同一篇阅读）的其他文件
+
+        Returns:
+            [(文件 id, 共用的题目组数)]，按共用数降序
+        """
+        counts = {}
+        for group in self.file_question_groups.get(file_id, ()):
+            for other in {other for other, _ in self.question_groups[group]}:
+                if other != file_id:
+                    counts[other] = counts.get(other, 0) + 1
+        shared = sorted(counts.items(), key=lambda pair: (-pair[1], pair[0]))
+        return shared[:limit]
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Extracted Question Cache
+按需加载文档时的题目缓存：内存 LRU + 磁盘缓存两级，键为 文件路径 + 修改时间 + 大小
+"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+# 提取规则变化时递增，使旧缓存失效
+CACHE_VERSION = 2
+
+DEFAULT_MEMORY_BUDGET = 32 * 1024 * 1024
+DEFAULT_DISK_BUDGET = 256 * 1024 * 1024
+
+def _questions_size(questions):
+    """题目列表占用的近似字节数（UTF-8 文本长度）"""
+    return sum(len(q.encode("utf-8")) for q in questions)
+
+class QuestionCache:
+    """
+    题目提取结果的两级缓存
+
+    - 内存层：OrderedDict 实现的 LRU，总字节数超过 memory_budget 时淘汰最久未用的项
+    - 磁盘层：cache_dir 下每个文档一个 JSON 文件，总字节数超过 disk_budget 时
+      按最近访问时间（命中时更新文件 mtime）淘汰
+
+    文件被修改后修改时间或大小变化，键随之变化，旧条目自然失效并最终被淘汰。
+    """
+
+    def __init__(self, cache_dir=None, memory_budget=DEFAULT_MEMORY_BUDGET,
+                 disk_budget=DEFAULT_DISK_BUDGET):
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.lock = threading.Lock()
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+        self.cache_dir = cache_dir if disk_budget > 0 else None
+        self.disk_bytes = 0
+        if self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                self.disk_bytes = sum(
+                    entry.stat().st_size for entry in os.scandir(self.cache_dir)
+                    if entry.name.endswith(".json")
+                )
+            except OSError as e:
+                print(f"⚠️ 磁盘缓存不可用，仅使用内存缓存: {e}")
+                self.cache_dir = None
+
+    @staticmethod
+    def cache_key(file_path):
+        """文件路径 + 修改时间 + 大小 的哈希；文件不存在时返回 None"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        raw = f"{CACHE_VERSION}|{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, file_path):
+        """
+        读取缓存的题目列表
+
+        Returns:
+            题目列表；未命中时返回 None
+        """
+        key = self.cache_key(file_path)
+        if key is None:
+            return None
+
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return list(entry[0])
+
+        questions = self._disk_get(key)
+        with self.lock:
+            if questions is None:
+                self.counters["misses"] += 1
+                return None
+            self.counters["disk_hits"] += 1
+            self._memory_put(key, questions)
+        return list(questions)
+
+    def put(self, file_path, questions):
+        """写入缓存（内存和磁盘两层）"""
+        key = self.cache_key(file_path)
+        if key is None:
+            return
+        questions = list(questions)
+        with self.lock:
+            self._memory_put(key, questions)
+        self._disk_put(key, questions)
+
+    def set_budgets(self, memory_budget=None, disk_budget=None):
+        """
+        调整两层的字节预算（None 表示不变），超出新预算的部分立即淘汰
+
+        磁盘预算为 0 时磁盘层被清空且不再写入。
+        """
+        with self.lock:
+            if memory_budget is not None:
+                self.memory_budget = memory_budget
+                self._evict_memory()
+            if disk_budget is not None:
+                self.disk_budget = disk_budget
+                if self.cache_dir and self.disk_bytes > self.disk_budget:
+                    self._evict_disk()
+
+    def stats(self):
+        """命中/未命中计数和当前占用"""
+        with self.lock:
+            stats = dict(self.counters)
+            stats["memory_entries"] = len(self.memory)
+            stats["memory_bytes"] = self.memory_bytes
+            stats["disk_bytes"] = self.disk_bytes
+        return stats
+
+    def clear(self):
+        """清空两层缓存"""
+        with self.lock:
+            self.memory.clear()
+            self.memory_bytes = 0
+            if self.cache_dir:
+                for entry in os.scandir(self.cache_dir):
+                    if entry.name.endswith(".json"):
+                        try:
+                            os.remove(entry.path)
+                        except OSError:
+                            pass
+                self.disk_bytes = 0
+
+    def _memory_put(self, key, questions):
+        # 调用方需持有 self.lock
+        size = _questions_size(questions)
+        if size > self.memory_budget:
+            return
+        old = self.memory.pop(key, None)
+        if old is not None:
+            self.memory_bytes -= old[1]
+        self.memory[key] = (questions, size)
+        self.memory_bytes += size
+        self._evict_memory()
+
+    def _evict_memory(self):
+        # 调用方需持有 self.lock
+        while self.memory_bytes > self.memory_budget:
+            _, (_, evicted_size) = self.memory.popitem(last=False)
+            self.memory_bytes -= evicted_size
+            self.counters["memory_evictions"] += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def _disk_get(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                questions = json.load(f)
+            # 更新访问时间，用于 LRU 淘汰
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return questions
+
+    def _disk_put(self, key, questions):
+        if not self.cache_dir:
+            return
+        data = json.dumps(questions, ensure_ascii=False).encode("utf-8")
+        if len(data) > self.disk_budget:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ 写入磁盘缓存失败: {e}")
+            return
+        with self.lock:
+            self.disk_bytes += len(data) - old_size
+            if self.disk_bytes > self.disk_budget:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        # 调用方需持有 self.lock；按 mtime 从旧到新删除，直到回到预算的 90%
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        entries.sort()
+
+        total = sum(size for _, _, size in entries)
+        target = self.disk_budget * 0.9
+        for _, path, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.counters["disk_evictions"] += 1
+        self.disk_bytes = total
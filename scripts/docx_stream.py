@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Streaming reader for word/document.xml
+直接从 docx 压缩包中流式解析正文 XML，不构建 python-docx Document，
+也不读取图片等其他部件
+"""
+
+import zipfile
+import xml.etree.ElementTree as ET
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+MC_NS = "http://schemas.openxmlformats.org/markup-compatibility/2006"
+DOCUMENT_PART = "word/document.xml"
+
+def w_tag(name):
+    """返回带命名空间的 w: 标签名"""
+    return f"{{{W_NS}}}{name}"
+
+W_P = w_tag("p")
+W_R = w_tag("r")
+W_T = w_tag("t")
+W_TAB = w_tag("tab")
+W_BR = w_tag("br")
+W_CR = w_tag("cr")
+W_BR_TYPE = w_tag("type")
+W_NO_BREAK_HYPHEN = w_tag("noBreakHyphen")
+W_TBL = w_tag("tbl")
+MC_FALLBACK = f"{{{MC_NS}}}Fallback"
+
+def iter_paragraph_texts(docx_path):
+    """
+    按文档顺序流式产出段落文本
+
+    包含表格单元格和文本框中的段落。mc:Fallback 中的内容与 mc:Choice 重复，
+    会被跳过。调用方提前停止迭代时，压缩包会随生成器关闭。
+
+    Args:
+        docx_path: docx文件路径
+
+    Yields:
+        (text, container): 段落文本（未去除首尾空白）和所在位置：
+        "body"（正文段落）、"table"（表格单元格）或 "textbox"（文本框）
+    """
+    with zipfile.ZipFile(docx_path) as zf:
+        with zf.open(DOCUMENT_PART) as f:
+            # 每个打开的段落一个文本缓冲区（文本框段落会嵌套在外层段落的 run 中）
+            para_stack = []
+            run_stack = []
+            run_depth = 0
+            table_depth = 0
+            fallback_depth = 0
+
+            for event, elem in ET.iterparse(f, events=("start", "end")):
+                tag = elem.tag
+
+                if event == "start":
+                    if tag == MC_FALLBACK:
+                        fallback_depth += 1
+                    elif fallback_depth:
+                        continue
+                    elif tag == W_P:
+                        para_stack.append([])
+                        run_stack.append(run_depth)
+                        run_depth = 0
+                    elif tag == W_R:
+                        run_depth += 1
+                    elif tag == W_TBL:
+                        table_depth += 1
+                    continue
+
+                if tag == MC_FALLBACK:
+                    fallback_depth -= 1
+                    elem.clear()
+                    continue
+                if fallback_depth:
+                    continue
+
+                # 只统计 run 内的文本元素（段落属性中的 w:tab 是制表位定义）
+                if run_depth and para_stack:
+                    if tag == W_T:
+                        if elem.text:
+                            para_stack[-1].append(elem.text)
+                        continue
+                    if tag == W_TAB:
+                        para_stack[-1].append("\t")
+                        continue
+                    if tag == W_BR:
+                        # 与 python-docx 一致：分页/分栏符不产生文本
+                        if elem.get(W_BR_TYPE, "textWrapping") == "textWrapping":
+                            para_stack[-1].append("\n")
+                        continue
+                    if tag == W_CR:
+                        para_stack[-1].append("\n")
+                        continue
+                    if tag == W_NO_BREAK_HYPHEN:
+                        para_stack[-1].append("-")
+                        continue
+
+                if tag == W_R:
+                    run_depth -= 1
+                elif tag == W_P:
+                    parts = para_stack.pop()
+                    run_depth = run_stack.pop()
+                    elem.clear()
+                    if para_stack:
+                        container = "textbox"
+                    elif table_depth:
+                        container = "table"
+                    else:
+                        container = "body"
+                    yield "".join(parts), container
+                elif tag == W_TBL:
+                    table_depth -= 1
+                    elem.clear()
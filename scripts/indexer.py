@@ -7,12 +7,42 @@ Resource Indexer for Question Bank
 import os
 import json
 import glob
+import argparse
+import hashlib
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 from docx import Document
 from pathlib import Path
 from datetime import datetime
 
+try:
+    from .docx_stream import iter_paragraph_texts
+    from .textindex import build_postings, write_inverted_index
+    from .sqlite_index import write_sqlite_index
+    from .questions import split_questions, iter_docx_questions, write_question_store, QuestionStore
+    from .colindex import write_columnar_index
+    from .vecindex import write_vector_index
+    from .dedup import (minhash_signature, write_minhash_index, load_signatures, question_signature,
+                        question_duplicate_groups, write_question_signatures, load_question_signatures)
+except ImportError:
+    from docx_stream import iter_paragraph_texts
+    from textindex import build_postings, write_inverted_index
+    from sqlite_index import write_sqlite_index
+    from questions import split_questions, iter_docx_questions, write_question_store, QuestionStore
+    from colindex import write_columnar_index
+    from vecindex import write_vector_index
+    from dedup import (minhash_signature, write_minhash_index, load_signatures, question_signature,
+                       question_duplicate_groups, write_question_signatures, load_question_signatures)
+
 RESOURCE_PATH = "/Users/xielk/webdata/english/lesson/resource"
 INDEX_FILE = os.path.join(RESOURCE_PATH, "index.json")
+INVERTED_INDEX_FILE = os.path.join(RESOURCE_PATH, "inverted_index.json")
+SQLITE_INDEX_FILE = os.path.join(RESOURCE_PATH, "index.db")
+QUESTION_STORE_FILE = os.path.join(RESOURCE_PATH, "questions.db")
+COLUMNAR_INDEX_FILE = os.path.join(RESOURCE_PATH, "index.qbc")
+VECTOR_INDEX_FILE = os.path.join(RESOURCE_PATH, "index_vectors.npz")
+MINHASH_FILE = os.path.join(RESOURCE_PATH, "minhash.json")
+QUESTION_MINHASH_FILE = os.path.join(RESOURCE_PATH, "question_minhash.json")
 
 def extract_metadata_from_path(file_path):
     """从文件路径解析元数据"""
@@ -80,7 +110,40 @@ def extract_metadata_from_path(file_path):
     }
 
 def extract_preview(docx_path, max_chars=500):
-    """提取文档预览内容"""
+    """提取文档预览内容
+
+    优先使用流式 XML 快速路径；文件无法按 zip/XML 读取时回退到 python-docx。
+    """
+    try:
+        return extract_preview_fast(docx_path, max_chars=max_chars)
+    except Exception:
+        return extract_preview_docx(docx_path, max_chars=max_chars)
+
+def extract_preview_fast(docx_path, max_chars=500):
+    """流式提取文档预览内容
+
+    只读取压缩包中的 word/document.xml，按文档顺序收集段落和表格文本，
+    收集满 max_chars 个字符即停止解析，不读取图片等其他部件。
+    """
+    preview_parts = []
+    char_count = 0
+    
+    for text, container in iter_paragraph_texts(docx_path):
+        text = text.strip()
+        if not text:
+            continue
+        # 表格中常有重复的表头/选项文本
+        if container == "table" and text in preview_parts:
+            continue
+        preview_parts.append(text)
+        char_count += len(text)
+        if char_count >= max_chars:
+            break
+    
+    return " ".join(preview_parts)[:max_chars]
+
+def extract_preview_docx(docx_path, max_chars=500):
+    """提取文档预览内容（python-docx 完整解析）"""
     try:
         doc = Document(docx_path)
         preview_parts = []
@@ -114,50 +177,274 @@ def extract_preview(docx_path, max_chars=500):
         print(f"Error extracting preview from {docx_path}: {e}")
         return ""
 
-def create_index():
-    """创建题库索引"""
+def extract_file_questions(docx_path):
+    """切分文档中的全部题目（与 searcher 按需加载时的规则一致，包含表格和文本框）"""
+    try:
+        return list(iter_docx_questions(docx_path))
+    except Exception:
+        return split_questions(para.text for para in Document(docx_path).paragraphs)
+
+def extract_file_text(docx_path):
+    """文档全文（正文、表格和文本框段落，按文档顺序换行拼接），用于计算 MinHash 签名"""
+    try:
+        return "\n".join(text for text, _ in iter_paragraph_texts(docx_path))
+    except Exception:
+        return "\n".join(para.text for para in Document(docx_path).paragraphs)
+
+def file_hash(file_path, block_size=1 << 20):
+    """计算文件内容的 SHA-1"""
+    h = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def index_file(docx_file, use_hash=False, with_questions=False, with_minhash=False):
+    """索引单个文件（可在子进程中运行）
+
+    Args:
+        docx_file: docx文件路径
+        use_hash: 是否记录内容哈希（用于增量索引比对）
+        with_questions: 是否同时切分题目（结果放在 "questions" 字段）
+        with_minhash: 是否计算全文 MinHash 签名（结果放在 "minhash" 字段，全文为空时为 None）；
+                      同时切分题目时还计算每道题目的签名（"question_minhash" 字段）
+
+    Returns:
+        (file_info, error): 成功时 error 为 None，失败时 file_info 为 None
+    """
+    try:
+        # 提取元数据
+        metadata = extract_metadata_from_path(docx_file)
+        
+        # 提取预览
+        preview = extract_preview(docx_file)
+        
+        # 获取文件信息
+        stat = os.stat(docx_file)
+        file_info = {
+            "file": docx_file,
+            "filename": os.path.basename(docx_file),
+            "year": metadata["year"],
+            "district": metadata["district"],
+            "exam_type": metadata["exam_type"],
+            "question_type": metadata["question_type"],
+            "preview": preview,
+            "size_kb": stat.st_size // 1024,
+            "size_bytes": stat.st_size,
+            "mtime": stat.st_mtime,
+            "modified": datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d")
+        }
+        if use_hash:
+            file_info["sha1"] = file_hash(docx_file)
+        if with_questions:
+            file_info["questions"] = extract_file_questions(docx_file)
+        if with_minhash:
+            # 已切分题目时直接复用（签名忽略空白，与全文的结果相同），避免再解析一遍
+            if with_questions:
+                text = "\n".join(file_info["questions"])
+            else:
+                text = extract_file_text(docx_file)
+            file_info["minhash"] = minhash_signature(text)
+            if with_questions:
+                file_info["question_minhash"] = [question_signature(q) for q in file_info["questions"]]
+        return file_info, None
+    except Exception as e:
+        return None, str(e)
+
+def iter_index_results(docx_files, workers=1, chunksize=None, use_hash=False, with_questions=False,
+                       with_minhash=False):
+    """按输入顺序产出每个文件的索引结果
+
+    Args:
+        docx_files: 文件路径列表
+        workers: 进程数，1 表示在当前进程串行处理
+        chunksize: 每次分发给子进程的文件数，默认按进程数自动计算
+        use_hash: 是否记录内容哈希
+        with_questions: 是否同时切分题目
+        with_minhash: 是否同时计算 MinHash 签名
+
+    Yields:
+        (docx_file, file_info, error)
+    """
+    if workers <= 1 or len(docx_files) <= 1:
+        for docx_file in docx_files:
+            yield (docx_file,) + index_file(docx_file, use_hash=use_hash, with_questions=with_questions,
+                                            with_minhash=with_minhash)
+        return
+    
+    if not chunksize:
+        # 每个进程大约分到4批，兼顾负载均衡和进程间通信开销
+        chunksize = max(1, len(docx_files) // (workers * 4))
+    
+    task = partial(index_file, use_hash=use_hash, with_questions=with_questions, with_minhash=with_minhash)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map 按提交顺序返回结果，保证 id 分配确定
+        for docx_file, result in zip(docx_files, pool.map(task, docx_files, chunksize=chunksize)):
+            yield (docx_file,) + result
+
+def load_existing_index():
+    """读取已有索引
+
+    Returns:
+        ({文件路径: 索引项}, metadata)；索引不存在或损坏时返回 ({}, {})
+    """
+    if not os.path.exists(INDEX_FILE):
+        return {}, {}
+    try:
+        with open(INDEX_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 无法读取已有索引，将全量重建: {e}")
+        return {}, {}
+    items = {item["file"]: item for item in data.get("files", []) if "file" in item}
+    return items, data.get("metadata", {})
+
+def is_unchanged(item, docx_file, use_hash=False):
+    """判断文件自上次索引后是否未变化
+
+    先比较大小和修改时间；启用 use_hash 时，对大小相同但修改时间变化的
+    文件再比较内容哈希（例如仅被 touch 或重新复制的文件）。
+    若判定未变化，会就地更新索引项中的修改时间。
+    """
+    if "size_bytes" not in item or "mtime" not in item:
+        # 旧版索引缺少比对字段，需要重新提取
+        return False
+    
+    stat = os.stat(docx_file)
+    if item["size_bytes"] != stat.st_size:
+        return False
+    if item["mtime"] == stat.st_mtime:
+        return not use_hash or "sha1" in item
+    if not use_hash or "sha1" not in item:
+        return False
+    if file_hash(docx_file) != item["sha1"]:
+        return False
+    
+    item["mtime"] = stat.st_mtime
+    item["modified"] = datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d")
+    return True
+
+def create_index(workers=1, chunksize=None, incremental=False, use_hash=False, sqlite=False,
+                 questions=False, columnar=False, vectors=False, dedup=False):
+    """创建题库索引
+
+    Args:
+        workers: 并行进程数（默认1，串行）
+        chunksize: 每批分发的文件数
+        incremental: 增量模式，仅重新提取新增或修改的文件，并保留原有 id
+        use_hash: 记录并比对内容哈希
+        sqlite: 同时写入 SQLite 数据库（index.db）
+        questions: 同时切分每份试卷的题目并写入题目库（questions.db）
+        columnar: 同时写入列式二进制索引（index.qbc）
+        vectors: 同时写入 TF-IDF 向量索引（index_vectors.npz，需要 NumPy；
+                 与 questions 同时使用时题目文本也参与向量化）
+        dedup: 同时计算全文 MinHash 签名并找出重复试卷（minhash.json）；
+               与 questions 同时使用时还找出在不同试卷间重复的题目（question_minhash.json）
+    """
     print("开始创建题库索引...")
     print(f"搜索路径: {RESOURCE_PATH}")
     
     index = []
-    total_size = 0
+    errors = []
     
-    # 查找所有docx文件
-    docx_files = glob.glob(os.path.join(RESOURCE_PATH, "**/*.docx"), recursive=True)
+    # 查找所有docx文件（排序以保证 id 稳定）
+    docx_files = sorted(glob.glob(os.path.join(RESOURCE_PATH, "**/*.docx"), recursive=True))
     print(f"找到 {len(docx_files)} 个docx文件")
+    if workers > 1:
+        print(f"并行进程数: {workers}")
     
+    # 分配 id：全量模式按排序位置；增量模式沿用已有 id，新文件顺延
+    previous, previous_metadata = load_existing_index() if incremental else ({}, {})
+    
+    # 增量模式下沿用旧题目库中未变化文件的题目。
+    # 题目库按文件 id 存储，只有与已有 index.json 同批生成时 id 才对应同一文件
+    # （中间未带 --questions 的全量重建会重新编号而不更新题目库），否则全部重新切分
+    questions_by_id = {}
+    old_store = None
+    stored_files = {}
+    if questions and incremental:
+        old_store = QuestionStore.open(QUESTION_STORE_FILE, previous_metadata)
+        if old_store is not None:
+            stored_files = old_store.file_paths()
+        elif os.path.exists(QUESTION_STORE_FILE):
+            print("⚠️ 题目库与已有索引不一致，将重新切分全部题目")
+    
+    # 增量模式下沿用未变化文件的 MinHash 签名（同样只沿用与已有索引同批生成、路径一致的）
+    signatures = {}
+    old_signatures = load_signatures(MINHASH_FILE, previous_metadata) if dedup and incremental else {}
+    question_dedup = dedup and questions
+    question_signatures = {}
+    old_question_signatures = (load_question_signatures(QUESTION_MINHASH_FILE, previous_metadata)
+                               if question_dedup and incremental else {})
+    
+    file_ids = {}
+    to_extract = []
+    next_id = max((item.get("id", 0) for item in previous.values()), default=0) + 1
     for i, docx_file in enumerate(docx_files, 1):
-        try:
-            # 提取元数据
-            metadata = extract_metadata_from_path(docx_file)
-            
-            # 提取预览
-            preview = extract_preview(docx_file)
-            
-            # 获取文件信息
-            stat = os.stat(docx_file)
-            file_info = {
-                "id": i,
-                "file": docx_file,
-                "filename": os.path.basename(docx_file),
-                "year": metadata["year"],
-                "district": metadata["district"],
-                "exam_type": metadata["exam_type"],
-                "question_type": metadata["question_type"],
-                "preview": preview,
-                "size_kb": stat.st_size // 1024,
-                "modified": datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d")
-            }
-            
-            index.append(file_info)
-            total_size += stat.st_size
-            
-            if i % 50 == 0:
-                print(f"已处理 {i}/{len(docx_files)} 个文件...")
-                
-        except Exception as e:
-            print(f"处理文件出错 {docx_file}: {e}")
+        item = previous.get(docx_file)
+        if item is None:
+            file_ids[docx_file] = next_id if incremental else i
+            next_id += 1
+            to_extract.append(docx_file)
+            continue
+        
+        file_ids[docx_file] = item["id"]
+        if questions and stored_files.get(item["id"]) != docx_file:
+            to_extract.append(docx_file)
+        elif dedup and old_signatures.get(item["id"], (None,))[0] != docx_file:
+            to_extract.append(docx_file)
+        elif question_dedup and old_question_signatures.get(item["id"], (None,))[0] != docx_file:
+            to_extract.append(docx_file)
+        elif is_unchanged(item, docx_file, use_hash=use_hash):
+            index.append(item)
+            if questions:
+                questions_by_id[item["id"]] = [
+                    q["content"] for q in old_store.questions_for(item["id"])
+                ]
+            if dedup:
+                signatures[item["id"]] = old_signatures[item["id"]][1]
+            if question_dedup:
+                question_signatures[item["id"]] = old_question_signatures[item["id"]][1]
+        else:
+            to_extract.append(docx_file)
+    
+    if old_store is not None:
+        old_store.close()
+    
+    if incremental:
+        removed = len(set(previous) - set(file_ids))
+        print(f"增量模式: 未变化 {len(index)} 个, 待提取 {len(to_extract)} 个, 已删除 {removed} 个")
+    
+    results = iter_index_results(
+        to_extract,
+        workers=workers,
+        chunksize=chunksize,
+        use_hash=use_hash,
+        with_questions=questions,
+        with_minhash=dedup
+    )
+    for i, (docx_file, file_info, error) in enumerate(results, 1):
+        if error is not None:
+            print(f"处理文件出错 {docx_file}: {error}")
+            errors.append({"file": docx_file, "error": error})
             continue
+        
+        file_id = file_ids[docx_file]
+        if questions:
+            questions_by_id[file_id] = file_info.pop("questions")
+        if dedup:
+            signature = file_info.pop("minhash")
+            if signature is not None:
+                signatures[file_id] = signature
+        if question_dedup:
+            question_signatures[file_id] = file_info.pop("question_minhash")
+        index.append(dict(id=file_id, **file_info))
+        
+        if i % 50 == 0:
+            print(f"已处理 {i}/{len(to_extract)} 个文件...")
+    
+    index.sort(key=lambda item: item["id"])
+    total_size = sum(item["size_bytes"] for item in index)
     
     # 保存索引
     index_data = {
@@ -165,18 +452,86 @@ def create_index():
             "total_files": len(index),
             "total_size_mb": total_size / (1024 * 1024),
             "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "resource_path": RESOURCE_PATH
+            "resource_path": RESOURCE_PATH,
+            "failed_files": len(errors)
         },
-        "files": index
+        "files": index,
+        "errors": errors
     }
     
-    with open(INDEX_FILE, 'w', encoding='utf-8') as f:
+    # 保存倒排索引（文件名 + 预览，含 BM25 词频统计）
+    postings, frequencies, doc_lengths = build_postings(index)
+    write_inverted_index(INVERTED_INDEX_FILE, postings, index_data["metadata"], frequencies, doc_lengths)
+    
+    if questions:
+        write_question_store(QUESTION_STORE_FILE, index_data, questions_by_id)
+    
+    # 附属索引写入失败时只跳过该文件，index.json 照常写入，不丢弃已完成的提取；
+    # searcher 按 index_created_at 识别并忽略过期或缺失的附属文件
+    if sqlite:
+        try:
+            write_sqlite_index(SQLITE_INDEX_FILE, index_data)
+        except Exception as e:
+            print(f"⚠️ 跳过 SQLite 索引: {e}")
+            sqlite = False
+    
+    if columnar:
+        try:
+            write_columnar_index(COLUMNAR_INDEX_FILE, index_data)
+        except Exception as e:
+            print(f"⚠️ 跳过列式索引: {e}")
+            columnar = False
+    
+    if vectors:
+        try:
+            write_vector_index(VECTOR_INDEX_FILE, index_data, questions_by_id)
+        except ImportError as e:
+            print(f"⚠️ 跳过向量索引: {e}")
+            vectors = False
+    
+    dup_groups = []
+    question_groups = []
+    if dedup:
+        try:
+            files = {item["id"]: item["file"] for item in index}
+            if question_dedup:
+                question_groups = question_duplicate_groups(question_signatures, questions_by_id)
+                write_question_signatures(QUESTION_MINHASH_FILE, index_data["metadata"],
+                                          question_signatures, files)
+            dup_groups = write_minhash_index(MINHASH_FILE, index_data["metadata"], signatures,
+                                             files, question_groups)
+        except Exception as e:
+            print(f"⚠️ 跳过重复检测: {e}")
+            dedup = False
+    
+    # index.json 最后写入并原子替换：正在运行的 searcher 检测到它变化时，
+    # 配套的倒排索引和题目库已经就绪
+    tmp_file = INDEX_FILE + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
         json.dump(index_data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_file, INDEX_FILE)
     
     print(f"\n✅ 索引创建完成!")
     print(f"   - 文件总数: {len(index)}")
     print(f"   - 总大小: {total_size / (1024 * 1024):.2f} MB")
+    if errors:
+        print(f"   - 失败文件: {len(errors)}")
     print(f"   - 索引位置: {INDEX_FILE}")
+    print(f"   - 倒排索引: {INVERTED_INDEX_FILE} ({len(postings)} 个词项)")
+    if sqlite:
+        print(f"   - SQLite索引: {SQLITE_INDEX_FILE}")
+    if questions:
+        total_questions = sum(len(qs) for qs in questions_by_id.values())
+        print(f"   - 题目库: {QUESTION_STORE_FILE} ({total_questions} 道题目)")
+    if columnar:
+        print(f"   - 列式索引: {COLUMNAR_INDEX_FILE}")
+    if vectors:
+        print(f"   - 向量索引: {VECTOR_INDEX_FILE}")
+    if dedup:
+        duplicated = sum(len(ids) for ids in dup_groups)
+        print(f"   - 重复检测: {MINHASH_FILE} ({len(dup_groups)} 组, 共 {duplicated} 个文件)")
+        if question_dedup:
+            print(f"   - 重复题目: {len(question_groups)} 组")
     
     # 显示统计信息
     print("\n📊 统计信息:")
@@ -196,4 +551,36 @@ def create_index():
     return index_data
 
 if __name__ == "__main__":
-    create_index()
+    arg_parser = argparse.ArgumentParser(description="生成题库索引")
+    arg_parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                            help="并行进程数（默认CPU核数，1为串行）")
+    arg_parser.add_argument("--chunksize", type=int, default=None,
+                            help="每批分发给子进程的文件数（默认自动）")
+    arg_parser.add_argument("-i", "--incremental", action="store_true",
+                            help="增量更新：只重新提取新增或修改的文件")
+    arg_parser.add_argument("--hash", dest="use_hash", action="store_true",
+                            help="记录并比对文件内容哈希（SHA-1）")
+    arg_parser.add_argument("--sqlite", action="store_true",
+                            help="同时生成 SQLite 索引（index.db），供 searcher 的 sqlite 后端使用")
+    arg_parser.add_argument("--questions", action="store_true",
+                            help="同时切分题目并写入题目库（questions.db），smart_search 无需再打开docx")
+    arg_parser.add_argument("--columnar", action="store_true",
+                            help="同时生成列式二进制索引（index.qbc），供 searcher 的 columnar 后端 mmap 加载")
+    arg_parser.add_argument("--vectors", action="store_true",
+                            help="同时生成 TF-IDF 向量索引（index_vectors.npz，需要 NumPy），供 searcher.search_similar 使用")
+    arg_parser.add_argument("--dedup", action="store_true",
+                            help="同时计算全文 MinHash 签名，找出重复试卷（minhash.json），smart_search 据此合并重复；"
+                                 "与 --questions 同时使用时还找出不同试卷间重复的题目")
+    args = arg_parser.parse_args()
+    
+    create_index(
+        workers=args.workers,
+        chunksize=args.chunksize,
+        incremental=args.incremental,
+        use_hash=args.use_hash,
+        sqlite=args.sqlite,
+        questions=args.questions,
+        columnar=args.columnar,
+        vectors=args.vectors,
+        dedup=args.dedup
+    )
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Parse Result Cache
+模板解析结果的内容寻址缓存：键为 docx 文件内容的哈希 + 解析器版本
+
+同一模板反复解析时，命中缓存只需要对文件做一次哈希、读一次缓存文件，
+不再打开 docx、重建章节树和上下文。
+缓存用 marshal 保存（比 JSON 解析快得多）；marshal 格式随 Python 版本变化，
+所以键中也包含 Python 版本。总大小超过预算时按最近访问时间淘汰。
+"""
+
+import os
+import sys
+import marshal
+import hashlib
+import threading
+
+RESOURCE_PATH = "/Users/xielk/webdata/english/lesson/resource"
+PARSE_CACHE_DIR = os.path.join(RESOURCE_PATH, ".cache", "parse")
+
+DEFAULT_DISK_BUDGET = 64 * 1024 * 1024
+
+SUFFIX = ".parse"
+HASH_CHUNK = 1024 * 1024
+
+def file_digest(file_path):
+    """文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ParseCache:
+    """
+    解析结果的磁盘缓存
+
+    cache_dir 下每个结果一个文件，文件名即键；命中时更新文件 mtime，
+    总字节数超过 disk_budget 时从最久未用的开始删除，直到回到预算的 90%。
+    """
+
+    def __init__(self, cache_dir=PARSE_CACHE_DIR, disk_budget=DEFAULT_DISK_BUDGET):
+        self.cache_dir = cache_dir
+        self.disk_budget = disk_budget
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0}
+        self.disk_bytes = None
+
+    def cache_key(self, file_path, parser_version):
+        """
+        docx 内容哈希 + 解析器版本 + Python 版本（marshal 格式）组成的键
+
+        Raises:
+            OSError: 文件无法读取
+        """
+        raw = f"{parser_version}|{sys.version_info[0]}.{sys.version_info[1]}|{file_digest(file_path)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + SUFFIX)
+
+    def get(self, key):
+        """
+        读取缓存的解析结果
+
+        Returns:
+            解析结果；未命中或缓存文件损坏时返回 None
+        """
+        path = self._path(key)
+        try:
+            # 整体读入再 loads：marshal.load 逐段读取文件对象，慢一个数量级
+            with open(path, 'rb') as f:
+                result = marshal.loads(f.read())
+            # 更新访问时间，用于 LRU 淘汰
+            os.utime(path)
+        except FileNotFoundError:
+            result = None
+        except (OSError, ValueError, EOFError, TypeError):
+            # 损坏的缓存文件：删除后当作未命中
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            result = None
+
+        with self.lock:
+            self.counters["hits" if result is not None else "misses"] += 1
+        return result
+
+    def put(self, key, result):
+        """写入解析结果（先写临时文件再原子替换）"""
+        data = marshal.dumps(result)
+        if len(data) > self.disk_budget:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ 写入解析缓存失败: {e}", file=sys.stderr)
+            return
+
+        with self.lock:
+            if self.disk_bytes is None:
+                self.disk_bytes = self._scan_size()
+            else:
+                self.disk_bytes += len(data) - old_size
+            if self.disk_bytes > self.disk_budget:
+                self._evict()
+
+    def stats(self):
+        """命中/未命中/淘汰计数"""
+        with self.lock:
+            return dict(self.counters)
+
+    def clear(self):
+        """删除全部缓存文件"""
+        with self.lock:
+            for path, _, _ in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.disk_bytes = 0
+
+    def _entries(self):
+        # [(路径, mtime, 大小)]
+        entries = []
+        try:
+            scan = list(os.scandir(self.cache_dir))
+        except OSError:
+            return entries
+        for entry in scan:
+            if entry.name.endswith(SUFFIX):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((entry.path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, _, size in self._entries())
+
+    def _evict(self):
+        # 调用方需持有 self.lock
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        target = self.disk_budget * 0.9
+        for path, _, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.counters["evictions"] += 1
+        self.disk_bytes = total
@@ -2,13 +2,41 @@ import json
 import re
 import sys
 import os
+import glob
+import time
+import argparse
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from lxml import etree
 from docx import Document
 from docx.document import Document as _Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn, nsmap
+from docx.oxml.parser import element_class_lookup
 from docx.oxml.text.paragraph import CT_P
 from docx.oxml.table import CT_Tbl
+from docx.parts.styles import StylesPart
+from docx.styles.styles import Styles
 from docx.table import _Cell, Table
 from docx.text.paragraph import Paragraph
 
+try:
+    from .tablegrid import TableGrid
+    from .parsecache import ParseCache, PARSE_CACHE_DIR
+except ImportError:
+    from tablegrid import TableGrid
+    from parsecache import ParseCache, PARSE_CACHE_DIR
+
+# Bump whenever parse_docx output changes, so cached results are not reused
+PARSER_VERSION = 1
+
+HEADING_STYLE = re.compile(r'(?:Heading|标题)\s*(\d+)', re.IGNORECASE)
+
+# Engines that turn the document body into block records for parse_docx
+ENGINES = ("lxml", "python-docx")
+
 # -------------------------------------------------------
 # Iteration Helper
 # -------------------------------------------------------
@@ -31,14 +59,332 @@ def iter_block_items(parent):
         elif isinstance(child, CT_Tbl):
             yield Table(child, parent)
 
+def list_level(p):
+    """
+    Numbering level of a list paragraph (CT_P element), or None if it is not a list item.
+    """
+    pPr = p.pPr
+    if pPr is None or pPr.numPr is None:
+        return None
+    try:
+        return int(pPr.numPr.ilvl.val)
+    except (AttributeError, ValueError):
+        return 0
+
+# -------------------------------------------------------
+# Block Engines
+# -------------------------------------------------------
+# Both engines yield the same records, in document order:
+#   ("table", first_row_cells, rows, cols, text_content)
+#       first_row_cells is None for a table without rows
+#   ("paragraph", style_name, heading_level, alignment, text, list_level)
+#       heading_level is None for a non-heading paragraph, alignment is
+#       str(alignment) or None, text is stripped
+
+def iter_blocks_python_docx(doc):
+    """
+    Reference engine: goes through python-docx Paragraph/Table wrapper objects.
+    """
+    for block in iter_block_items(doc):
+        if isinstance(block, Table):
+            first_row_cells = None
+            if len(block.rows) > 0:
+                first_row_cells = [c.text.strip() for c in block.rows[0].cells]
+
+            table_texts = []
+            for row in block.rows:
+                for cell in row.cells:
+                    cell_text_parts = [cp.text.strip() for cp in cell.paragraphs if cp.text.strip()]
+                    if cell_text_parts:
+                        table_texts.append(" ".join(cell_text_parts))
+
+            yield ("table", first_row_cells, len(block.rows),
+                   len(block.columns) if block.rows else 0, table_texts)
+
+        elif isinstance(block, Paragraph):
+            style_name = block.style.name if block.style else ""
+            match = HEADING_STYLE.search(style_name)
+            yield ("paragraph", style_name, int(match.group(1)) if match else None,
+                   str(block.alignment) if block.alignment else None,
+                   block.text.strip(), list_level(block._p))
+
+W_P = qn("w:p")
+W_TBL = qn("w:tbl")
+W_TYPE = qn("w:type")
+
+# Text equivalents of run content, as in python-docx's CT_R.text
+RUN_TEXT_XPATH = etree.XPath("w:r/* | w:hyperlink/w:r/*", namespaces=nsmap)
+RUN_TEXT = {
+    qn("w:tab"): "\t",
+    qn("w:ptab"): "\t",
+    qn("w:cr"): "\n",
+    qn("w:noBreakHyphen"): "-",
+}
+W_T = qn("w:t")
+W_BR = qn("w:br")
+
+def paragraph_text(p):
+    """Text of a CT_P element, same as python-docx's Paragraph.text, with a single XPath."""
+    parts = []
+    for e in RUN_TEXT_XPATH(p):
+        tag = e.tag
+        if tag == W_T:
+            parts.append(e.text or "")
+        elif tag == W_BR:
+            if e.get(W_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        else:
+            parts.append(RUN_TEXT.get(tag, ""))
+    return "".join(parts)
+
+def paragraph_style_map(styles):
+    """
+    Style id -> (style name, heading level) for paragraph styles, resolved once per document.
+
+    styles is the document's python-docx Styles object. The None key holds the default
+    paragraph style, which python-docx also returns for missing, unknown and
+    non-paragraph style ids.
+    """
+    def resolve(style_id):
+        style = styles.get_by_id(style_id, WD_STYLE_TYPE.PARAGRAPH)
+        name = style.name if style else ""
+        match = HEADING_STYLE.search(name) if name else None
+        return name, int(match.group(1)) if match else None
+
+    style_map = {None: resolve(None)}
+    for style_id in styles.element.xpath("w:style/@w:styleId"):
+        if style_id not in style_map:
+            style_map[style_id] = resolve(style_id)
+    return style_map
+
+def block_record(child, styles, default_style):
+    """
+    Block record for one body child (CT_P/CT_Tbl element), or None for anything else.
+    """
+    if child.tag == W_TBL:
+        grid = TableGrid(child)
+        # Paragraph texts of each unique cell, read once however many grid cells it spans
+        cell_texts = {tc: [paragraph_text(p) for p in tc.p_lst] for tc in grid.cells}
+
+        first_row_cells = None
+        if len(grid) > 0:
+            first_row_cells = ["\n".join(cell_texts[tc]).strip() for tc in grid.row_cells(0)]
+
+        table_texts = []
+        for cells in grid:
+            for tc in cells:
+                cell_text_parts = [t.strip() for t in cell_texts[tc] if t.strip()]
+                if cell_text_parts:
+                    table_texts.append(" ".join(cell_text_parts))
+
+        return ("table", first_row_cells, len(grid),
+                grid.col_count if len(grid) else 0, table_texts)
+
+    if child.tag == W_P:
+        pPr = child.pPr
+        style_id = pPr.style if pPr is not None else None
+        style_name, heading_level = styles.get(style_id, default_style)
+        alignment = pPr.jc_val if pPr is not None else None
+        return ("paragraph", style_name, heading_level,
+                str(alignment) if alignment else None,
+                paragraph_text(child).strip(), list_level(child))
+
+    return None
+
+def iter_blocks_lxml(doc):
+    """
+    Fast engine: works on the CT_P/CT_Tbl elements directly, with styles resolved once
+    per document and run text gathered by a compiled XPath.
+    """
+    styles = paragraph_style_map(doc.styles)
+    default_style = styles[None]
+
+    for child in doc.element.body.iterchildren():
+        record = block_record(child, styles, default_style)
+        if record is not None:
+            yield record
+
 # -------------------------------------------------------
 # Core Parser
 # -------------------------------------------------------
-def parse_docx(file_path):
+def parse_docx(file_path, engine="lxml", cache=None):
+    """
+    Parse a docx template into its section tree with slot context.
+
+    engine selects how the body is read: "lxml" (default, fast) or "python-docx"
+    (reference implementation); both produce identical output.
+
+    cache is an optional ParseCache. Results are keyed by a hash of the docx bytes
+    plus PARSER_VERSION, so an unchanged template costs one hash and one read.
+    """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine} (choose from {', '.join(ENGINES)})")
+
+    if cache is None:
+        return _parse_docx(file_path, engine)
+    key = cache.cache_key(file_path, PARSER_VERSION)
+    result = cache.get(key)
+    if result is None:
+        result = _parse_docx(file_path, engine)
+        cache.put(key, result)
+    return result
+
+# -------------------------------------------------------
+# Block Builders (shared by parse_docx and the streaming parser)
+# -------------------------------------------------------
+def table_block(t_id, record):
+    _, first_row_cells, n_rows, n_cols, table_texts = record
+
+    # Simple fingerprinting
+    table_role = "general_table"
+    first_row_text = ""
+    if first_row_cells is not None:
+        first_row_text = " ".join(first_row_cells)
+
+        if "姓名" in first_row_text and "年级" in first_row_text:
+            table_role = "student_info"
+        elif "教学内容" in first_row_text or "教学目标" in first_row_text:
+            table_role = "lesson_meta"
+        elif "题目" in first_row_text or "Answer" in first_row_text:
+            table_role = "qa_table"
+
+    return {
+        "id": t_id,
+        "type": "table",
+        "table_role": table_role,
+        "rows": n_rows,
+        "cols": n_cols,
+        "text_content": table_texts
+    }
+
+def section_node(sec_id, record):
+    _, _, heading_level, _, text, _ = record
+
+    sec_role = "general_section"
+    if "知识" in text or "讲解" in text:
+        sec_role = "teach"
+    elif "训练" in text or "练习" in text:
+        sec_role = "practice"
+    elif "回顾" in text:
+        sec_role = "review"
+    elif "反思" in text:
+        sec_role = "reflection"
+    elif "答案" in text:
+        sec_role = "answer_key"
+
+    return {
+        "id": sec_id,
+        "title": text,
+        "level": heading_level,
+        "section_role": sec_role,
+        "blocks": [],
+        "sub_sections": []
+    }
+
+def paragraph_block(p_id, record):
+    _, style_name, _, alignment, text, lvl = record
+
+    style_info = {
+       "name": style_name,
+       "alignment": alignment
+    }
+
+    block_type = "paragraph"
+    payload = {}
+
+    # List detection
+    if lvl is not None:
+        block_type = "list"
+        payload = {"level": lvl}
 
+    elif not text:
+        block_type = "empty_paragraph"
+
+    # Question ID detection
+    clean_text = text
+    if text:
+        q_match = re.match(r'^(\d+)[\.、\s]+(.*)', text)
+        if q_match:
+            payload["question_id"] = int(q_match.group(1))
+            payload["is_question"] = True
+            clean_text = q_match.group(2).strip()
+
+    base_data = {
+        "id": p_id,
+        "type": block_type,
+        "text": clean_text,
+        "raw_text": text,
+        "style": style_info
+    }
+    base_data.update(payload)
+    return base_data
+
+# Number of preceding text items a slot sees as its context
+CONTEXT_WINDOW = 8
+
+class ContextInjector:
+    """
+    Marks slots (empty paragraphs and tables) and gives each one the text of the
+    blocks before it, over a sliding window of CONTEXT_WINDOW items.
+
+    Blocks must be fed in document order; start_section() is called before the
+    blocks of each section.
+    """
+
+    def __init__(self):
+        self.context_buffer = deque(maxlen=CONTEXT_WINDOW)
+        self.last_was_empty_slot = False
+
+    def start_section(self):
+        self.last_was_empty_slot = False
+
+    def process(self, block, location_name, parent_role="unknown"):
+        """
+        Annotate one block in place.
+
+        Returns:
+            False if the block is dropped (an empty paragraph right after another one)
+        """
+        b_type = block["type"]
+        b_text = block.get("raw_text", "").strip()
+        b_table_content = block.get("text_content", [])
+
+        is_slot = b_type == "empty_paragraph" or b_type == "table"
+
+        if is_slot:
+            if b_type == "empty_paragraph" and self.last_was_empty_slot:
+                return False
+
+            block["context"] = list(self.context_buffer)
+            block["location"] = location_name
+            block["is_slot"] = True
+
+            slot_role = "general_slot"
+            if block.get("table_role"):
+                slot_role = block.get("table_role")
+            elif parent_role != "unknown":
+                slot_role = f"{parent_role}_content"
+            elif "反思" in location_name or any("反思" in t for t in self.context_buffer):
+                slot_role = "reflection_input"
+
+            block["slot_role"] = slot_role
+            self.last_was_empty_slot = b_type == "empty_paragraph"
+        else:
+            self.last_was_empty_slot = False
+
+        if b_text:
+            self.context_buffer.append(b_text)
+        self.context_buffer.extend(b_table_content)
+        return True
+
+# -------------------------------------------------------
+# Tree Parser
+# -------------------------------------------------------
+def _parse_docx(file_path, engine):
     doc = Document(file_path)
+    blocks = iter_blocks_lxml(doc) if engine == "lxml" else iter_blocks_python_docx(doc)
     
     root = {
         "id": "root",
@@ -51,87 +397,20 @@ def parse_docx(file_path):
     
     counts = {"sec": 0, "p": 0, "t": 0}
 
-    for block in iter_block_items(doc):
+    for block in blocks:
         # === A. Handler for Tables ===
-        if isinstance(block, Table):
+        if block[0] == "table":
             counts["t"] += 1
-            t_id = f"t_{counts['t']}"
-            
-            # Simple fingerprinting
-            table_role = "general_table"
-            first_row_text = ""
-            if len(block.rows) > 0:
-                first_row_cells = [c.text.strip() for c in block.rows[0].cells]
-                first_row_text = " ".join(first_row_cells)
-                
-                if "姓名" in first_row_text and "年级" in first_row_text:
-                    table_role = "student_info"
-                elif "教学内容" in first_row_text or "教学目标" in first_row_text:
-                    table_role = "lesson_meta"
-                elif "题目" in first_row_text or "Answer" in first_row_text:
-                    table_role = "qa_table"
-
-            table_texts = []
-            for row in block.rows:
-                for cell in row.cells:
-                    cell_text_parts = [cp.text.strip() for cp in cell.paragraphs if cp.text.strip()]
-                    if cell_text_parts:
-                        table_texts.append(" ".join(cell_text_parts))
-            
-            block_data = {
-                "id": t_id,
-                "type": "table",
-                "table_role": table_role,
-                "rows": len(block.rows),
-                "cols": len(block.columns) if block.rows else 0,
-                "text_content": table_texts 
-            }
-            
-            section_stack[-1]["blocks"].append(block_data)
+            section_stack[-1]["blocks"].append(table_block(f"t_{counts['t']}", block))
             continue
 
         # === B. Handler for Paragraphs ===
-        if isinstance(block, Paragraph):
-            style_name = block.style.name if block.style else ""
-            text = block.text.strip()
-            
-            style_info = {
-               "name": style_name,
-               "alignment": str(block.alignment) if block.alignment else None
-            }
-            
-            is_heading = False
-            heading_level = 0
-            
-            match = re.search(r'(?:Heading|标题)\s*(\d+)', style_name, re.IGNORECASE)
-            if match:
-                is_heading = True
-                heading_level = int(match.group(1))
+        if block[0] == "paragraph":
+            heading_level = block[2]
 
-            if is_heading:
+            if heading_level is not None:
                 counts["sec"] += 1
-                new_sec_id = f"sec_{counts['sec']}"
-                
-                sec_role = "general_section"
-                if "知识" in text or "讲解" in text:
-                    sec_role = "teach"
-                elif "训练" in text or "练习" in text:
-                    sec_role = "practice"
-                elif "回顾" in text:
-                    sec_role = "review"
-                elif "反思" in text:
-                    sec_role = "reflection"
-                elif "答案" in text:
-                    sec_role = "answer_key"
-                
-                new_section = {
-                    "id": new_sec_id,
-                    "title": text,
-                    "level": heading_level,
-                    "section_role": sec_role,
-                    "blocks": [],
-                    "sub_sections": []
-                }
+                new_section = section_node(f"sec_{counts['sec']}", block)
                 
                 while section_stack[-1]["level"] >= heading_level:
                     section_stack.pop()
@@ -141,41 +420,7 @@ def parse_docx(file_path):
                 
             else:
                 counts["p"] += 1
-                p_id = f"p_{counts['p']}"
-                
-                block_type = "paragraph"
-                payload = {}
-
-                # List detection
-                if block._p.pPr is not None and block._p.pPr.numPr is not None:
-                    block_type = "list"
-                    try:
-                        lvl = int(block._p.pPr.numPr.ilvl.val)
-                    except (AttributeError, ValueError):
-                        lvl = 0
-                    payload = {"level": lvl}
-                
-                elif not text:
-                    block_type = "empty_paragraph"
-                
-                # Question ID detection
-                clean_text = text
-                if text:
-                    q_match = re.match(r'^(\d+)[\.、\s]+(.*)', text)
-                    if q_match:
-                        payload["question_id"] = int(q_match.group(1))
-                        payload["is_question"] = True
-                        clean_text = q_match.group(2).strip()
-
-                base_data = {
-                    "id": p_id,
-                    "type": block_type,
-                    "text": clean_text,
-                    "raw_text": text,
-                    "style": style_info
-                }
-                base_data.update(payload)
-                section_stack[-1]["blocks"].append(base_data)
+                section_stack[-1]["blocks"].append(paragraph_block(f"p_{counts['p']}", block))
 
     # -------------------------------------------------------
     # Post-Processing
@@ -195,60 +440,11 @@ def parse_docx(file_path):
     root["sub_sections"] = filter_sections(root["sub_sections"])
 
     # 2. Context Injection
-    context_buffer = [] 
+    injector = ContextInjector()
     
     def process_blocks(blocks, location_name, parent_role="unknown"):
-        nonlocal context_buffer
-        processed_list = []
-        last_was_empty_slot = False
-        
-        for block in blocks:
-            b_type = block["type"]
-            b_text = block.get("raw_text", "").strip()
-            b_table_content = block.get("text_content", [])
-            
-            is_slot = False
-            if b_type == "empty_paragraph":
-                is_slot = True
-            elif b_type == "table":
-                is_slot = True
-            
-            if is_slot:
-                if b_type == "empty_paragraph" and last_was_empty_slot:
-                    continue 
-
-                block["context"] = list(context_buffer)
-                block["location"] = location_name
-                block["is_slot"] = True
-                
-                slot_role = "general_slot"
-                if block.get("table_role"):
-                    slot_role = block.get("table_role")
-                elif parent_role != "unknown":
-                    slot_role = f"{parent_role}_content"
-                elif "反思" in location_name or "反思" in str(context_buffer):
-                     slot_role = "reflection_input"
-                
-                block["slot_role"] = slot_role
-                processed_list.append(block)
-                
-                if b_type == "empty_paragraph":
-                    last_was_empty_slot = True
-                else:
-                    last_was_empty_slot = False
-            else:
-                processed_list.append(block)
-                last_was_empty_slot = False
-            
-            if b_text:
-                context_buffer.append(b_text)
-            if b_table_content:
-                for t in b_table_content:
-                    context_buffer.append(t)
-            if len(context_buffer) > 8:
-                context_buffer = context_buffer[-8:]
-        
-        blocks[:] = processed_list
+        injector.start_section()
+        blocks[:] = [b for b in blocks if injector.process(b, location_name, parent_role)]
 
     if root["blocks"]:
         process_blocks(root["blocks"], "preamble", "preamble")
@@ -268,15 +464,296 @@ def parse_docx(file_path):
         
     return result
 
+# -------------------------------------------------------
+# Streaming Parser
+# -------------------------------------------------------
+DOCUMENT_PART = "word/document.xml"
+STYLES_PART = "word/styles.xml"
+W_BODY = qn("w:body")
+
+def load_styles(zf):
+    """python-docx Styles for an open docx zip, falling back to the default styles part."""
+    if STYLES_PART in zf.namelist():
+        styles_xml = zf.read(STYLES_PART)
+    else:
+        styles_xml = StylesPart._default_styles_xml()
+    return Styles(parse_xml(styles_xml))
+
+def iter_body_records(file_path):
+    """
+    Block records (as from the engines above) read incrementally from word/document.xml.
+
+    Each top-level w:p/w:tbl is turned into a record as soon as its end tag is parsed,
+    then cleared and detached from w:body, so memory stays bounded by the largest
+    single block rather than the document.
+    """
+    with zipfile.ZipFile(file_path) as zf:
+        styles = paragraph_style_map(load_styles(zf))
+        default_style = styles[None]
+
+        with zf.open(DOCUMENT_PART) as f:
+            events = etree.iterparse(f, events=("end",), tag=(W_P, W_TBL),
+                                     remove_blank_text=True, resolve_entities=False)
+            # Same element classes as python-docx, so records match the other engines
+            events.set_element_class_lookup(element_class_lookup)
+
+            for _, elem in events:
+                body = elem.getparent()
+                # Paragraphs nested in tables are handled with their table
+                if body is None or body.tag != W_BODY:
+                    continue
+                record = block_record(elem, styles, default_style)
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del body[0]
+                if record is not None:
+                    yield record
+
+def iter_parse_stream(file_path):
+    """
+    Stream the parse of a docx template as flat records, in document order:
+
+        {"event": "section_open", "id", "title", "level", "section_role", "parent"}
+        {"event": "block", "section": section id or None (preamble), "block": {...}}
+        {"event": "section_close", "id"}
+
+    Blocks carry the same fields as in parse_docx, and the same sections are dropped:
+    a section is opened just before its first retained block, so sections without
+    content never appear, and nothing under an untitled heading is emitted. Context
+    comes from the sliding window of ContextInjector, so memory does not grow with
+    the document.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    # Open sections: [section, opened, suppressed]; blocks are never kept on them
+    section_stack = []
+    counts = {"sec": 0, "p": 0, "t": 0}
+    injector = ContextInjector()
+    injector.start_section()
+
+    def close(entry):
+        section, opened, _ = entry
+        if opened:
+            yield {"event": "section_close", "id": section["id"]}
+
+    def emit(block):
+        if section_stack:
+            if section_stack[-1][2]:
+                return
+            section = section_stack[-1][0]
+            keep = injector.process(block, section["title"], section["section_role"])
+        else:
+            keep = injector.process(block, "preamble", "preamble")
+        if not keep:
+            return
+
+        # Open the enclosing sections that have had no retained block yet
+        parent = None
+        for entry in section_stack:
+            section = entry[0]
+            if not entry[1]:
+                entry[1] = True
+                yield {
+                    "event": "section_open",
+                    "id": section["id"],
+                    "title": section["title"],
+                    "level": section["level"],
+                    "section_role": section["section_role"],
+                    "parent": parent
+                }
+            parent = section["id"]
+        yield {"event": "block", "section": parent, "block": block}
+
+    for record in iter_body_records(file_path):
+        if record[0] == "table":
+            counts["t"] += 1
+            yield from emit(table_block(f"t_{counts['t']}", record))
+            continue
+
+        heading_level = record[2]
+        if heading_level is not None:
+            counts["sec"] += 1
+            section = section_node(f"sec_{counts['sec']}", record)
+            del section["blocks"], section["sub_sections"]
+
+            while section_stack and section_stack[-1][0]["level"] >= heading_level:
+                yield from close(section_stack.pop())
+
+            suppressed = not section["title"].strip() or bool(section_stack and section_stack[-1][2])
+            section_stack.append([section, False, suppressed])
+            injector.start_section()
+        else:
+            counts["p"] += 1
+            yield from emit(paragraph_block(f"p_{counts['p']}", record))
+
+    while section_stack:
+        yield from close(section_stack.pop())
+
+# -------------------------------------------------------
+# Batch Parsing
+# -------------------------------------------------------
+def collect_batch_inputs(source):
+    """
+    .docx files for --batch: a directory (searched recursively) or a glob pattern.
+
+    Returns:
+        (base directory for output names, sorted file paths); Word lock files (~$*) are skipped
+    """
+    if os.path.isdir(source):
+        base = source
+        files = glob.glob(os.path.join(source, "**", "*.docx"), recursive=True)
+    else:
+        files = [f for f in glob.glob(os.path.expanduser(source), recursive=True) if os.path.isfile(f)]
+        base = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in files]) if files else "."
+    files = sorted(f for f in files if not os.path.basename(f).startswith("~$"))
+    return base, files
+
+def batch_output_path(file_path, base, out_dir):
+    """<out_dir>/<path relative to base, .docx replaced by .json>"""
+    rel = os.path.relpath(os.path.abspath(file_path), os.path.abspath(base))
+    return os.path.join(out_dir, os.path.splitext(rel)[0] + ".json")
+
+# Per-worker state, set once by the pool initializer
+_batch_engine = "lxml"
+_batch_cache = None
+
+def _init_batch_worker(engine, cache_dir):
+    global _batch_engine, _batch_cache
+    _batch_engine = engine
+    _batch_cache = ParseCache(cache_dir) if cache_dir else None
+
+def parse_batch_file(file_path, out_path=None):
+    """
+    Parse one file in a batch worker.
+
+    With out_path the structure is written there (same JSON as the single-file CLI);
+    without it the result comes back as one NDJSON line for the combined output.
+
+    Returns:
+        (seconds, ndjson line or None, error message or None)
+    """
+    start = time.perf_counter()
+    try:
+        data = parse_docx(file_path, engine=_batch_engine, cache=_batch_cache)
+        line = None
+        if out_path:
+            os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+            tmp_path = f"{out_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, out_path)
+        else:
+            line = json.dumps({"file": file_path, "structure": data}, ensure_ascii=False)
+        return time.perf_counter() - start, line, None
+    except Exception as e:
+        return time.perf_counter() - start, None, str(e)
+
+def parse_batch(files, base, out_dir, engine="lxml", cache_dir=None, workers=1, combined=False):
+    """
+    Parse many documents in a process pool, reporting each file as it finishes.
+
+    Every worker imports python-docx once and keeps its own ParseCache (cache_dir
+    None disables caching). Output is one .json per input under out_dir, mirroring
+    the layout under base, or a single out_dir/structures.ndjson when combined is set
+    (one {"file", "structure"} line per parsed file, in completion order).
+
+    Returns:
+        [(file path, error message)] for the files that failed
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    combined_path = os.path.join(out_dir, "structures.ndjson") if combined else None
+    combined_file = open(combined_path, 'w', encoding='utf-8') if combined else None
+    failures = []
+    start = time.perf_counter()
+
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, workers), initializer=_init_batch_worker,
+                                 initargs=(engine, cache_dir)) as pool:
+            futures = {}
+            for file_path in files:
+                out_path = None if combined else batch_output_path(file_path, base, out_dir)
+                futures[pool.submit(parse_batch_file, file_path, out_path)] = (file_path, out_path)
+
+            for future in as_completed(futures):
+                file_path, out_path = futures[future]
+                try:
+                    seconds, line, error = future.result()
+                except Exception as e:
+                    # The worker process itself died (e.g. killed for memory)
+                    seconds, line, error = 0.0, None, f"worker failed: {e}"
+
+                if error is not None:
+                    failures.append((file_path, error))
+                    print(f"❌ {file_path} ({seconds:.2f}s): {error}", flush=True)
+                    continue
+                if combined_file is not None:
+                    combined_file.write(line + "\n")
+                print(f"✅ {file_path} ({seconds:.2f}s) -> {out_path or combined_path}", flush=True)
+    finally:
+        if combined_file is not None:
+            combined_file.close()
+
+    print(f"\nParsed {len(files) - len(failures)}/{len(files)} files in "
+          f"{time.perf_counter() - start:.2f}s, {len(failures)} failed")
+    for file_path, error in failures:
+        print(f"  ❌ {file_path}: {error}")
+    return failures
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python parser.py <path_to_docx>")
-        sys.exit(1)
-        
-    file_path = sys.argv[1]
+    arg_parser = argparse.ArgumentParser(description="Parse a docx template into structure JSON")
+    arg_parser.add_argument("file_path", nargs="?", help="path to the .docx template")
+    arg_parser.add_argument("--engine", choices=ENGINES, default="lxml",
+                            help="body reader: lxml (fast, default) or python-docx (reference)")
+    arg_parser.add_argument("--no-cache", action="store_true",
+                            help="always re-parse, bypassing the parse result cache")
+    arg_parser.add_argument("--cache-dir", default=PARSE_CACHE_DIR,
+                            help=f"parse result cache directory (default {PARSE_CACHE_DIR})")
+    arg_parser.add_argument("--stream", action="store_true",
+                            help="print NDJSON records (section_open/block/section_close) as the "
+                                 "document is read, with memory independent of document length")
+    arg_parser.add_argument("--batch", metavar="DIR_OR_GLOB",
+                            help="parse every .docx in a directory (recursively) or matching a glob")
+    arg_parser.add_argument("--out", metavar="DIR",
+                            help="output directory for --batch: one .json per input")
+    arg_parser.add_argument("--ndjson", action="store_true",
+                            help="with --batch, write a single <out>/structures.ndjson instead")
+    arg_parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                            help="worker processes for --batch (default: CPU count)")
+    args = arg_parser.parse_args()
     
+    if args.batch:
+        if args.file_path or args.stream:
+            arg_parser.error("--batch cannot be combined with a file path or --stream")
+        if not args.out:
+            arg_parser.error("--batch requires --out")
+        base, files = collect_batch_inputs(args.batch)
+        if not files:
+            arg_parser.error(f"no .docx files found for {args.batch}")
+        print(f"Parsing {len(files)} files with {min(args.workers, len(files))} workers")
+        failures = parse_batch(files, base, args.out, engine=args.engine,
+                               cache_dir=None if args.no_cache else args.cache_dir,
+                               workers=min(args.workers, len(files)), combined=args.ndjson)
+        sys.exit(1 if failures else 0)
+    if not args.file_path:
+        arg_parser.error("a file path (or --batch) is required")
+
+    if args.stream:
+        try:
+            for record in iter_parse_stream(args.file_path):
+                print(json.dumps(record, ensure_ascii=False), flush=True)
+        except BrokenPipeError:
+            # The consumer stopped reading (e.g. `| head`); silence the flush at exit
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(0)
+        except Exception as e:
+            print(json.dumps({"event": "error", "error": str(e)}, ensure_ascii=False), flush=True)
+            sys.exit(1)
+        sys.exit(0)
+
     try:
-        data = parse_docx(file_path)
+        cache = None if args.no_cache else ParseCache(args.cache_dir)
+        data = parse_docx(args.file_path, engine=args.engine, cache=cache)
         print(json.dumps(data, indent=2, ensure_ascii=False))
     except Exception as e:
         print(json.dumps({"error": str(e)}, ensure_ascii=False))
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Question Segmentation and Question Store
+题目切分规则，以及索引阶段预先切分好的题目库（questions.db）
+"""
+
+import os
+import re
+import sqlite3
+import threading
+
+try:
+    from .docx_stream import iter_paragraph_texts
+except ImportError:
+    from docx_stream import iter_paragraph_texts
+
+STORE_VERSION = 2
+
+# 题目开始的判定规则（预编译）
+QUESTION_NUMBER = re.compile(r'\d+[\.．\s]')          # 数字开头
+QUESTION_PREFIXES = ('【', '[', 'A.', 'B.', 'C.', 'D.')  # 【例题】或[例]、选项
+
+def is_question_start(text):
+    """检测是否是题目开始（通常包含数字、题号、问号等）"""
+    return bool(
+        QUESTION_NUMBER.match(text) or
+        text.startswith(QUESTION_PREFIXES) or
+        '?' in text or                        # 包含问号
+        '（' in text and '）' in text         # 包含括号选项
+    )
+
+def iter_questions(texts, keyword=None):
+    """
+    将段落文本切分为题目，逐题产出
+
+    Args:
+        texts: 段落文本序列（按文档顺序，可以是惰性的迭代器）
+        keyword: 可选的关键词过滤
+
+    Yields:
+        题目文本
+    """
+    keyword_lower = keyword.lower() if keyword else None
+    current_question = []
+
+    for text in texts:
+        text = text.strip()
+        if not text:
+            continue
+
+        if current_question and is_question_start(text):
+            # 产出上一题
+            full_question = '\n'.join(current_question)
+            if not keyword_lower or keyword_lower in full_question.lower():
+                yield full_question
+            current_question = []
+
+        current_question.append(text)
+
+    # 处理最后一题
+    if current_question:
+        full_question = '\n'.join(current_question)
+        if not keyword_lower or keyword_lower in full_question.lower():
+            yield full_question
+
+def split_questions(texts, keyword=None):
+    """
+    将段落文本切分为题目
+
+    Args:
+        texts: 段落文本序列（按文档顺序）
+        keyword: 可选的关键词过滤
+
+    Returns:
+        题目列表
+    """
+    return list(iter_questions(texts, keyword=keyword))
+
+def iter_docx_questions(docx_path, keyword=None):
+    """
+    流式切分 docx 中的题目
+
+    只遍历一遍 word/document.xml，按文档顺序包含正文、表格单元格和文本框中的段落；
+    逐题产出，调用方取够题目后停止迭代即不再解析文件的剩余部分。
+
+    Args:
+        docx_path: docx文件路径
+        keyword: 可选的关键词过滤
+
+    Yields:
+        题目文本
+    """
+    texts = (text for text, _ in iter_paragraph_texts(docx_path))
+    yield from iter_questions(texts, keyword=keyword)
+
+STORE_SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE files (
+    file_id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    question_count INTEGER NOT NULL
+);
+CREATE TABLE questions (
+    file_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    year TEXT,
+    district TEXT,
+    exam_type TEXT,
+    file TEXT NOT NULL,
+    PRIMARY KEY (file_id, position)
+);
+"""
+
+def _contains(text, keyword_lower):
+    return keyword_lower in text.lower()
+
+def write_question_store(db_path, index_data, questions_by_id):
+    """
+    写入题目库
+
+    先写临时文件再原子替换。
+
+    Args:
+        db_path: 数据库文件路径
+        index_data: 索引数据（用于来源信息和一致性校验）
+        questions_by_id: {文件 id: 题目文本列表}，未出现的文件不写入
+    """
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(STORE_SCHEMA)
+        conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?)",
+            [
+                ("store_version", str(STORE_VERSION)),
+                ("index_created_at", index_data["metadata"].get("created_at", "")),
+            ]
+        )
+        for item in index_data["files"]:
+            questions = questions_by_id.get(item["id"])
+            if questions is None:
+                continue
+            conn.execute(
+                "INSERT INTO files (file_id, file, question_count) VALUES (?, ?, ?)",
+                (item["id"], item["file"], len(questions))
+            )
+            conn.executemany(
+                "INSERT INTO questions (file_id, position, content, year, district, exam_type, file)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (item["id"], position, content, item.get("year"), item.get("district"),
+                     item.get("exam_type"), item["file"])
+                    for position, content in enumerate(questions)
+                ]
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, db_path)
+
+class QuestionStore:
+    """只读题目库：按文件 id 取回预切分的题目"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        self.conn.create_function("contains_lower", 2, _contains, deterministic=True)
+        self.lock = threading.Lock()
+
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        self.version = meta.get("store_version")
+        self.index_created_at = meta.get("index_created_at")
+
+    @classmethod
+    def open(cls, db_path, index_metadata=None):
+        """
+        打开题目库
+
+        Returns:
+            QuestionStore；文件不存在、版本不符或与索引不一致时返回 None
+        """
+        if not os.path.exists(db_path):
+            return None
+        try:
+            store = cls(db_path)
+        except sqlite3.Error:
+            return None
+
+        if store.version != str(STORE_VERSION) or (
+            index_metadata is not None
+            and store.index_created_at != index_metadata.get("created_at")
+        ):
+            store.close()
+            return None
+        return store
+
+    def close(self):
+        self.conn.close()
+
+    def has_file(self, file_id):
+        """文件是否已预切分（包括没有切出题目的文件）"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM files WHERE file_id = ?", (file_id,)
+            ).fetchone()
+        return row is not None
+
+    def file_ids(self):
+        """所有已预切分的文件 id"""
+        with self.lock:
+            return {row[0] for row in self.conn.execute("SELECT file_id FROM files")}
+
+    def file_paths(self):
+        """已预切分的文件 {文件 id: 文件路径}"""
+        with self.lock:
+            return dict(self.conn.execute("SELECT file_id, file FROM files"))
+
+    def questions_for(self, file_id, keyword=None, limit=None):
+        """
+        取回某个文件的题目
+
+        Args:
+            file_id: 索引中的文件 id
+            keyword: 可选的关键词过滤（与 split_questions 相同的子串语义）
+            limit: 最多返回的题目数
+
+        Returns:
+            题目记录列表，每项含 content/position/year/district/exam_type/file
+        """
+        sql = ("SELECT content, position, year, district, exam_type, file"
+               " FROM questions WHERE file_id = ?")
+        params = [file_id]
+        if keyword:
+            sql += " AND contains_lower(content, ?)"
+            params.append(keyword.lower())
+        sql += " ORDER BY position"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [
+            {
+                "content": content,
+                "position": position,
+                "year": year,
+                "district": district,
+                "exam_type": exam_type,
+                "file": file
+            }
+            for content, position, year, district, exam_type, file in rows
+        ]
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Search Daemon
+常驻的搜索服务：索引、题目缓存和线程池留在内存中，通过 Unix 域套接字应答 JSON 请求
+
+协议：每个连接发送一行 JSON 请求，收到一行 JSON 响应
+    请求: {"method": "smart_search", "params": {...}}
+    响应: {"ok": true, "result": ...} 或 {"ok": false, "error": "..."}
+
+本模块只依赖标准库，客户端不需要导入 python-docx 或加载索引。
+"""
+
+import os
+import sys
+import json
+import signal
+import socket
+import threading
+import socketserver
+
+# 单个请求/响应的最大字节数
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+class DaemonUnavailable(Exception):
+    """守护进程未运行或无法连接"""
+
+class DaemonError(Exception):
+    """守护进程处理请求时出错"""
+
+def _read_line(sock):
+    """读取一行（以换行结尾）"""
+    chunks = []
+    total = 0
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        newline = chunk.find(b"\n")
+        if newline != -1:
+            chunks.append(chunk[:newline])
+            break
+        chunks.append(chunk)
+        total += len(chunk)
+        if total > MAX_MESSAGE_BYTES:
+            raise ValueError("消息过大")
+    return b"".join(chunks)
+
+def request(socket_path, method, params=None, timeout=30.0):
+    """
+    向守护进程发送一个请求
+
+    Args:
+        socket_path: 套接字路径
+        method: 方法名（如 search, smart_search）
+        params: 方法参数（关键字参数字典）
+        timeout: 连接和等待应答的超时秒数
+
+    Returns:
+        方法的返回值（JSON 解码后）
+
+    Raises:
+        DaemonUnavailable: 守护进程未运行
+        DaemonError: 守护进程返回错误
+    """
+    if not os.path.exists(socket_path):
+        raise DaemonUnavailable(f"守护进程未运行: {socket_path}")
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        try:
+            sock.connect(socket_path)
+        except OSError as e:
+            raise DaemonUnavailable(f"无法连接守护进程: {e}") from e
+        message = {"method": method, "params": params or {}}
+        sock.sendall(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+        line = _read_line(sock)
+    finally:
+        sock.close()
+
+    if not line:
+        raise DaemonUnavailable("守护进程关闭了连接")
+    response = json.loads(line)
+    if not response.get("ok"):
+        raise DaemonError(response.get("error", "未知错误"))
+    return response.get("result")
+
+def is_running(socket_path, timeout=1.0):
+    """守护进程是否在运行（能应答 ping）"""
+    try:
+        return request(socket_path, "ping", timeout=timeout) == "pong"
+    except (DaemonUnavailable, DaemonError, OSError, ValueError):
+        return False
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline(MAX_MESSAGE_BYTES)
+        if not line.strip():
+            return
+        try:
+            message = json.loads(line)
+            method = message.get("method")
+            if method == "ping":
+                result = "pong"
+            else:
+                handler = self.server.methods.get(method)
+                if handler is None:
+                    raise ValueError(f"未知的方法: {method}")
+                result = handler(**message.get("params", {}))
+            response = {"ok": True, "result": result}
+        except Exception as e:
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, methods):
+        self.methods = methods
+        super().__init__(socket_path, _Handler)
+
+def serve(socket_path, methods):
+    """
+    启动守护进程并阻塞运行，每个连接一个线程
+
+    套接字文件已存在时：有守护进程在应答则拒绝启动，否则视为上次异常退出留下的文件并删除。
+    收到 SIGTERM 时与 Ctrl+C 一样正常退出并删除套接字文件。
+
+    Args:
+        socket_path: 套接字路径
+        methods: {方法名: 可调用对象}，请求参数以关键字参数传入，返回值需可 JSON 序列化
+    """
+    if os.path.exists(socket_path):
+        if is_running(socket_path):
+            raise RuntimeError(f"守护进程已在运行: {socket_path}")
+        os.remove(socket_path)
+
+    server = _Server(socket_path, methods)
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        print(f"🚀 搜索服务已启动: {socket_path}")
+        server.serve_forever()
+    finally:
+        server.server_close()
+        try:
+            os.remove(socket_path)
+        except OSError:
+            pass
+        print("👋 搜索服务已停止")
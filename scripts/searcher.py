@@ -5,23 +5,166 @@ Question Bank Search Module - 按需加载
 """
 
 import os
+import sys
 import json
-import re
-from docx import Document
-from typing import List, Dict, Optional, Tuple
+import time
+import argparse
+import heapq
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Optional, Set, Tuple, Callable, Iterable, Iterator, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from docx import Document
+
+try:
+    from .textindex import InvertedIndex, MultiPatternMatcher
+    from .sqlite_index import SQLiteIndex
+    from .questions import split_questions, iter_docx_questions, QuestionStore
+    from .colindex import ColumnarIndex
+    from .doccache import QuestionCache, DEFAULT_MEMORY_BUDGET, DEFAULT_DISK_BUDGET
+    from .vecindex import VectorIndex
+    from .dedup import MinHashIndex
+    from .seenset import SeenSet, get_seen_set
+    from . import search_daemon
+except ImportError:
+    from textindex import InvertedIndex, MultiPatternMatcher
+    from sqlite_index import SQLiteIndex
+    from questions import split_questions, iter_docx_questions, QuestionStore
+    from colindex import ColumnarIndex
+    from doccache import QuestionCache, DEFAULT_MEMORY_BUDGET, DEFAULT_DISK_BUDGET
+    from vecindex import VectorIndex
+    from dedup import MinHashIndex
+    from seenset import SeenSet, get_seen_set
+    import search_daemon
 
 RESOURCE_PATH = "/Users/xielk/webdata/english/lesson/resource"
 INDEX_FILE = os.path.join(RESOURCE_PATH, "index.json")
+INVERTED_INDEX_FILE = os.path.join(RESOURCE_PATH, "inverted_index.json")
+SQLITE_INDEX_FILE = os.path.join(RESOURCE_PATH, "index.db")
+QUESTION_STORE_FILE = os.path.join(RESOURCE_PATH, "questions.db")
+COLUMNAR_INDEX_FILE = os.path.join(RESOURCE_PATH, "index.qbc")
+VECTOR_INDEX_FILE = os.path.join(RESOURCE_PATH, "index_vectors.npz")
+MINHASH_FILE = os.path.join(RESOURCE_PATH, "minhash.json")
+QUESTION_CACHE_DIR = os.path.join(RESOURCE_PATH, ".cache", "questions")
+SEARCH_SOCKET = os.path.join(RESOURCE_PATH, ".searcher.sock")
+
+FACETS = ("year", "district", "exam_type", "question_type")
+
+# 可选的索引后端
+BACKENDS = ("json", "sqlite", "columnar")
+
+# 并发加载时等待结果的轮询间隔（秒），决定响应取消/超时的及时程度
+FETCH_POLL_INTERVAL = 0.05
+
+# 跳过重复题目时每个文档多取的题目倍数，剔除重复后仍能凑够 max_questions_per_doc
+QUESTION_DEDUP_HEADROOM = 2
+
+# BM25 排序中年份新旧的权重（相关度归一化到 0~1 后与之相加）
+BM25_YEAR_WEIGHT = 0.3
+
+# 共享题目缓存的字节预算，可用 configure_question_cache 调整
+QUESTION_CACHE_MEMORY_BUDGET = DEFAULT_MEMORY_BUDGET
+QUESTION_CACHE_DISK_BUDGET = DEFAULT_DISK_BUDGET
+
+_question_cache = None
+_question_cache_lock = threading.Lock()
+
+def get_question_cache() -> QuestionCache:
+    """进程内共享的题目缓存（内存 LRU + QUESTION_CACHE_DIR 磁盘缓存）"""
+    global _question_cache
+    with _question_cache_lock:
+        if _question_cache is None:
+            _question_cache = QuestionCache(
+                cache_dir=QUESTION_CACHE_DIR,
+                memory_budget=QUESTION_CACHE_MEMORY_BUDGET,
+                disk_budget=QUESTION_CACHE_DISK_BUDGET
+            )
+    return _question_cache
+
+def configure_question_cache(memory_budget: Optional[int] = None, disk_budget: Optional[int] = None):
+    """
+    设置共享题目缓存的字节预算（None 表示不变）
+    
+    缓存已创建时立即生效（超出的部分被淘汰），已有的搜索器同样受影响；
+    disk_budget 为 0 表示只用内存缓存。
+    
+    使用示例:
+        configure_question_cache(memory_budget=128 * 1024 * 1024, disk_budget=0)
+    """
+    global QUESTION_CACHE_MEMORY_BUDGET, QUESTION_CACHE_DISK_BUDGET
+    with _question_cache_lock:
+        if memory_budget is not None:
+            QUESTION_CACHE_MEMORY_BUDGET = memory_budget
+        if disk_budget is not None:
+            QUESTION_CACHE_DISK_BUDGET = disk_budget
+        cache = _question_cache
+    if cache is not None:
+        cache.set_budgets(memory_budget, disk_budget)
+
+def check_backend(backend: str):
+    """
+    Raises:
+        ValueError: 未知的索引后端
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"未知的索引后端: {backend}")
+
+def rank_key(item: Dict) -> Tuple[int, int]:
+    """排序键 (年份, 文件大小)，搜索结果按此降序排列"""
+    year = item.get("year", "0")
+    return (int(year) if year.isdigit() else 0, item.get("size_kb", 999999))
 
 class QuestionBankSearcher:
     """题库搜索器 - 索引+按需加载"""
     
-    def __init__(self):
+    def __init__(self, backend: str = "json", use_cache: bool = True,
+                 question_cache: Optional[QuestionCache] = None):
+        """
+        Args:
+            backend: 索引后端，"json"（index.json 全量加载）、"sqlite"（index.db，查询下推到 SQL）
+                     或 "columnar"（index.qbc，mmap 列式索引）
+            use_cache: 按需加载文档时是否使用题目缓存（get_question_cache）
+            question_cache: 使用指定的题目缓存（如自定义预算的 QuestionCache）代替共享缓存
+        """
+        check_backend(backend)
+        self.backend = backend
         self.index = None
+        self.inverted = None
+        self.vectors = None
+        self.backend_index = None
+        self.question_store = None
+        self.duplicates = None
+        if use_cache:
+            self.question_cache = question_cache if question_cache is not None else get_question_cache()
+        else:
+            self.question_cache = None
+        # 正在后台补全缓存的文档（见 cache_remaining）
+        self.completing = set()
+        self.completing_lock = threading.Lock()
         self.load_index()
     
     def load_index(self):
         """加载索引文件"""
+        if self.backend == "sqlite":
+            # 只打开数据库连接，索引项按查询从磁盘读取
+            self.backend_index = SQLiteIndex(SQLITE_INDEX_FILE)
+            self.metadata = self.backend_index.metadata
+            print(f"✅ SQLite索引打开成功: {self.metadata.get('total_files', 0)} 个文件")
+            self.load_question_store()
+            self.load_duplicates()
+            return
+        
+        if self.backend == "columnar":
+            # 只做 mmap，筛选直接在列数组上进行
+            self.backend_index = ColumnarIndex(COLUMNAR_INDEX_FILE)
+            self.metadata = self.backend_index.metadata
+            print(f"✅ 列式索引映射成功: {self.metadata.get('total_files', 0)} 个文件")
+            self.load_question_store()
+            self.load_duplicates()
+            return
+        
         if not os.path.exists(INDEX_FILE):
             raise FileNotFoundError(
                 f"索引文件不存在: {INDEX_FILE}\n"
@@ -33,7 +176,50 @@ class QuestionBankSearcher:
             self.index = data.get("files", [])
             self.metadata = data.get("metadata", {})
         
+        # id -> 在索引中的位置，用于按原顺序取回倒排候选
+        self.positions = {item["id"]: pos for pos, item in enumerate(self.index)}
+        
+        # 排名顺序（年份降序、文件大小降序，同分保持索引顺序），搜索按此顺序扫描，
+        # 凑够 limit 条即停止
+        keys = [rank_key(item) for item in self.index]
+        self.rank_order = sorted(range(len(self.index)), key=keys.__getitem__, reverse=True)
+        self.rank = [0] * len(self.index)
+        for r, pos in enumerate(self.rank_order):
+            self.rank[pos] = r
+        
+        # 分面倒排：{分面: {取值: 位置集合}}，筛选时直接求交集
+        self.facet_index = {facet: {} for facet in FACETS}
+        for pos, item in enumerate(self.index):
+            for facet in FACETS:
+                self.facet_index[facet].setdefault(item.get(facet), set()).add(pos)
+        
+        # 倒排索引缺失或与 index.json 不一致时退回线性扫描
+        self.inverted = InvertedIndex.load(INVERTED_INDEX_FILE, self.metadata)
+        
+        # 向量索引是可选的（indexer.py --vectors，需要 NumPy）
+        self.vectors = VectorIndex.load(VECTOR_INDEX_FILE, self.metadata)
+        if self.vectors is not None:
+            self.vectors.set_tiebreak(self.rank)
+        
         print(f"✅ 索引加载成功: {self.metadata.get('total_files', 0)} 个文件")
+        if self.inverted is None:
+            print("⚠️ 倒排索引不可用，关键词搜索将逐项扫描（重新运行 indexer.py 可生成）")
+        
+        self.load_question_store()
+        self.load_duplicates()
+    
+    def load_question_store(self):
+        """打开预切分题目库（不存在或与索引不一致时为 None，smart_search 按需加载docx）"""
+        self.question_store = QuestionStore.open(QUESTION_STORE_FILE, self.metadata)
+        if self.question_store is not None:
+            print("✅ 题目库已就绪，优先从题目库提取题目")
+    
+    def load_duplicates(self):
+        """加载重复检测结果（indexer.py --dedup；不存在或与索引不一致时为 None，不合并重复）"""
+        self.duplicates = MinHashIndex.load(MINHASH_FILE, self.metadata)
+        if self.duplicates is not None:
+            print(f"✅ 重复检测已就绪: {len(self.duplicates.groups)} 组重复试卷, "
+                  f"{len(self.duplicates.question_groups)} 组重复题目")
     
     def search(
         self,
@@ -58,43 +244,176 @@ class QuestionBankSearcher:
         Returns:
             匹配的索引项列表
         """
+        if self.backend_index is not None:
+            return self.backend_index.search(
+                keyword=keyword,
+                year=year,
+                district=district,
+                exam_type=exam_type,
+                question_type=question_type,
+                limit=limit
+            )
+        
+        keyword_lower = keyword.lower() if keyword else None
+        positions = self.candidate_positions(keyword, year, district, exam_type, question_type)
+        
+        # 候选按排名顺序排列
+        if positions is None:
+            candidates = self.rank_order
+        else:
+            candidates = sorted(positions, key=self.rank.__getitem__)
+        
+        # 按排名逐项做子串校验（搜索文件名和预览内容），凑够 limit 条即停止
         results = []
+        for pos in candidates:
+            if len(results) >= limit:
+                break
+            item = self.index[pos]
+            if keyword and not self.matches_keyword(item, keyword_lower):
+                continue
+            results.append(item)
         
-        for item in self.index:
-            # 检查各个条件
-            match = True
-            
-            if year and item.get("year") != year:
-                match = False
-            
-            if district and item.get("district") != district:
-                match = False
-            
-            if exam_type and item.get("exam_type") != exam_type:
-                match = False
-            
-            if question_type and item.get("question_type") != question_type:
-                match = False
-            
-            if keyword:
-                keyword_lower = keyword.lower()
-                # 搜索文件名和预览内容
-                if (keyword_lower not in item.get("filename", "").lower() and 
-                    keyword_lower not in item.get("preview", "").lower()):
-                    match = False
-            
-            if match:
-                results.append(item)
+        return results
+    
+    def candidate_positions(
+        self,
+        keyword: Optional[str],
+        year: Optional[str],
+        district: Optional[str],
+        exam_type: Optional[str],
+        question_type: Optional[str]
+    ) -> Optional[set]:
+        """
+        分面筛选与关键词倒排求交后的候选位置（JSON 后端）
+        
+        Returns:
+            位置集合（关键词命中仍需子串校验）；None 表示没有任何可用约束，候选为全部
+        """
+        # 1. 分面筛选：从最小的位置集合开始求交
+        facet_sets = []
+        for facet, value in (("year", year), ("district", district),
+                             ("exam_type", exam_type), ("question_type", question_type)):
+            if value:
+                facet_sets.append(self.facet_index[facet].get(value, set()))
+        facet_sets.sort(key=len)
+        
+        positions = None
+        for pos_set in facet_sets:
+            positions = set(pos_set) if positions is None else positions & pos_set
+            if not positions:
+                return set()
+        
+        # 2. 关键词先通过倒排表求交缩小候选范围
+        if keyword and self.inverted is not None:
+            ids = self.inverted.candidates(keyword)
+            if ids is not None:
+                keyword_positions = {self.positions[i] for i in ids if i in self.positions}
+                positions = keyword_positions if positions is None else positions & keyword_positions
+        
+        return positions
+    
+    @staticmethod
+    def matches_keyword(item: Dict, keyword_lower: str) -> bool:
+        """文件名或预览是否包含关键词（忽略大小写的子串匹配）"""
+        return (keyword_lower in item.get("filename", "").lower() or
+                keyword_lower in item.get("preview", "").lower())
+    
+    def search_bm25(
+        self,
+        keyword: str,
+        year: Optional[str] = None,
+        district: Optional[str] = None,
+        exam_type: Optional[str] = None,
+        question_type: Optional[str] = None,
+        limit: int = 10,
+        year_weight: float = BM25_YEAR_WEIGHT
+    ) -> List[Dict]:
+        """
+        按 BM25 相关度搜索题库
+        
+        匹配条件与 search() 相同；排序时先将 BM25 分数按本次最高分归一化到 0~1，
+        再加上 year_weight × 年份新近度（最新年份为1，每早一年递减），用堆选出前 limit 个。
+        分数相同时沿用 search() 的年份/文件大小顺序。
+        索引不带词频统计（非 JSON 后端或旧版倒排索引）时退回 search()。
+        
+        Args:
+            keyword: 主题关键词
+            year_weight: 年份新近度的权重，0 表示只看相关度
+        
+        Returns:
+            匹配的索引项列表
+        """
+        if (self.backend_index is not None or self.inverted is None
+                or not self.inverted.has_term_stats or not keyword):
+            print("⚠️ BM25 统计不可用，使用默认排序（重新运行 indexer.py 可生成）")
+            return self.search(keyword, year, district, exam_type, question_type, limit)
         
-        # 按优先级排序：年份降序、文件大小升序（优先小文件）
-        results.sort(key=lambda x: (
-            int(x.get("year", "0")) if x.get("year", "0").isdigit() else 0,
-            x.get("size_kb", 999999)
-        ), reverse=True)
+        keyword_lower = keyword.lower()
+        positions = self.candidate_positions(keyword, year, district, exam_type, question_type)
+        candidates = range(len(self.index)) if positions is None else positions
+        matches = [pos for pos in candidates if self.matches_keyword(self.index[pos], keyword_lower)]
+        if not matches:
+            return []
         
-        return results[:limit]
+        scores = self.inverted.bm25_scores(keyword, {self.index[pos]["id"] for pos in matches})
+        max_score = max(scores.values()) or 1.0
+        newest_year = max(rank_key(self.index[pos])[0] for pos in matches)
+        
+        def blended(pos):
+            item = self.index[pos]
+            item_year = rank_key(item)[0]
+            recency = 1.0 / (1 + newest_year - item_year) if item_year else 0.0
+            return scores[item["id"]] / max_score + year_weight * recency
+        
+        top = heapq.nsmallest(limit, matches, key=lambda pos: (-blended(pos), self.rank[pos]))
+        return [self.index[pos] for pos in top]
     
-    def load_document(self, file_path: str) -> Document:
+    def search_similar(
+        self,
+        keyword: str,
+        year: Optional[str] = None,
+        district: Optional[str] = None,
+        exam_type: Optional[str] = None,
+        question_type: Optional[str] = None,
+        limit: int = 10
+    ) -> List[Dict]:
+        """
+        按 TF-IDF 余弦相似度搜索题库（字符 n-gram，不要求字面包含查询）
+        
+        分面条件与 search() 相同；相似度相同时沿用 search() 的年份/文件大小顺序。
+        向量索引不可用（非 JSON 后端、未运行 indexer.py --vectors 或未安装 NumPy）时退回 search()。
+        
+        Args:
+            keyword: 查询文本（主题、题干片段等）
+        
+        Returns:
+            按相似度降序的索引项列表
+        """
+        if self.vectors is None or not keyword:
+            print("⚠️ 向量索引不可用，使用关键词搜索（运行 indexer.py --vectors 可生成）")
+            return self.search(keyword, year, district, exam_type, question_type, limit)
+        
+        positions = self.candidate_positions(None, year, district, exam_type, question_type)
+        top = self.vectors.top_k(keyword, limit, rows=positions)
+        return [self.index[pos] for pos, _ in top]
+    
+    def facets(self) -> Dict[str, Dict[str, int]]:
+        """
+        各分面取值的文件数（年份、区域、考试类型、题型分布）
+        
+        Returns:
+            {分面: {取值: 文件数}}
+        """
+        if self.backend_index is not None:
+            return self.backend_index.facets()
+        return {
+            facet: {value: len(pos_set) for value, pos_set in sorted(
+                self.facet_index[facet].items(), key=lambda kv: str(kv[0])
+            )}
+            for facet in FACETS
+        }
+    
+    def load_document(self, file_path: str) -> "Document":
         """
         按需加载docx文档
         
@@ -107,12 +426,16 @@ class QuestionBankSearcher:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"文件不存在: {file_path}")
         
+        # python-docx 只在真正打开文档时导入，走守护进程的客户端无需承担导入开销
+        from docx import Document
+        
         print(f"📄 正在加载: {os.path.basename(file_path)} ({os.path.getsize(file_path)//1024}KB)")
         return Document(file_path)
     
-    def extract_questions(self, doc: Document, keyword: str = None) -> List[str]:
+    def extract_questions(self, doc: "Document", keyword: str = None) -> List[str]:
         """
-        从文档中提取题目
+        从已打开的 Document 中提取题目（只含正文段落；按文件加载请用 load_questions，
+        它同时覆盖表格和文本框）
         
         Args:
             doc: Document对象
@@ -121,39 +444,436 @@ class QuestionBankSearcher:
         Returns:
             题目列表
         """
-        questions = []
-        current_question = []
+        return split_questions((para.text for para in doc.paragraphs), keyword=keyword)
+    
+    def load_questions(
+        self,
+        file_path: str,
+        keyword: str = None,
+        limit: Optional[int] = None,
+        seen: Optional[SeenSet] = None
+    ) -> List[str]:
+        """
+        按需加载文档并提取题目，结果经过题目缓存
         
-        for para in doc.paragraphs:
-            text = para.text.strip()
-            if not text:
-                continue
-            
-            # 检测是否是题目开始（通常包含数字、题号、问号等）
-            is_question_start = bool(
-                re.match(r'^\d+[\.．\s]', text) or  # 数字开头
-                re.match(r'^[【\[]', text) or        # 【例题】或[例]
-                '?' in text or                        # 包含问号
-                '（' in text and '）' in text or     # 包含括号选项
-                text.startswith(('A.', 'B.', 'C.', 'D.'))  # 选项
+        未命中缓存时用 iter_docx_questions 流式切分（包含表格和文本框中的题目），
+        凑够 limit 道匹配的题目即返回，不等待文档其余部分的解析。
+        缓存保存文档的全部题目、关键词过滤在取出后进行：提前返回时由后台线程
+        （cache_remaining）读完剩余题目再写入缓存，之后同一文档的查询不再解析 docx。
+        
+        Args:
+            file_path: docx文件完整路径
+            keyword: 可选的关键词过滤
+            limit: 最多返回的题目数
+            seen: 学员已用题目集合，其中的题目不返回也不占 limit 名额
+        
+        Returns:
+            题目列表
+        """
+        keyword_lower = keyword.lower() if keyword else None
+        questions = self.question_cache.get(file_path) if self.question_cache else None
+        if questions is not None:
+            if keyword_lower:
+                questions = [q for q in questions if keyword_lower in q.lower()]
+            if seen is not None:
+                questions = [q for q in questions if q not in seen]
+            return questions[:limit]
+        
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"文件不存在: {file_path}")
+        print(f"📄 正在加载: {os.path.basename(file_path)} ({os.path.getsize(file_path)//1024}KB)")
+        
+        all_questions = []
+        matched = []
+        stream = iter_docx_questions(file_path)
+        handed_off = False
+        try:
+            for q in stream:
+                all_questions.append(q)
+                if keyword_lower and keyword_lower not in q.lower():
+                    continue
+                if seen is not None and q in seen:
+                    continue
+                matched.append(q)
+                if limit is not None and len(matched) >= limit:
+                    if self.question_cache:
+                        handed_off = self.cache_remaining(file_path, stream, all_questions)
+                    break
+            else:
+                if self.question_cache:
+                    self.question_cache.put(file_path, all_questions)
+        finally:
+            if not handed_off:
+                stream.close()
+        return matched
+    
+    def cache_remaining(self, file_path: str, stream: Iterator[str], questions: List[str]) -> bool:
+        """
+        在后台线程读完题目流的剩余部分，把完整的题目列表写入缓存
+        
+        Args:
+            file_path: docx文件完整路径
+            stream: 已部分读取的 iter_docx_questions 生成器，交由后台线程读完并关闭
+            questions: 已读出的题目（后台线程在其后追加）
+        
+        Returns:
+            是否已交给后台线程；同一文档已在后台补全时返回 False，调用方自行关闭 stream
+        """
+        with self.completing_lock:
+            if file_path in self.completing:
+                return False
+            self.completing.add(file_path)
+        
+        def complete():
+            try:
+                questions.extend(stream)
+                self.question_cache.put(file_path, questions)
+            except Exception as e:
+                # 解析失败的文档不写入缓存，下次查询时重新解析
+                print(f"⚠️ 后台补全题目缓存失败 {os.path.basename(file_path)}: {e}")
+            finally:
+                stream.close()
+                with self.completing_lock:
+                    self.completing.discard(file_path)
+        
+        # 守护线程：进程退出时不等待补全
+        threading.Thread(target=complete, name="question-cache-fill", daemon=True).start()
+        return True
+    
+    def fetch_questions(
+        self,
+        item: Dict,
+        topic: str,
+        max_questions_per_doc: int,
+        use_store: bool = True,
+        live_fallback: bool = True,
+        seen: Optional[SeenSet] = None
+    ) -> Optional[List[str]]:
+        """
+        取得单个索引项的题目：优先题目库，否则按需加载docx（经过题目缓存）
+        
+        seen 中的题目在截取 max_questions_per_doc 之前剔除，由后面未用过的题目补上。
+        
+        Returns:
+            题目列表；题目库中没有该文件且不允许回退加载时返回 None
+        """
+        store = self.question_store if use_store else None
+        if store is not None and store.has_file(item["id"]):
+            if seen is None:
+                return [
+                    q["content"] for q in store.questions_for(
+                        item["id"], keyword=topic, limit=max_questions_per_doc
+                    )
+                ]
+            questions = [
+                q["content"] for q in store.questions_for(item["id"], keyword=topic)
+                if q["content"] not in seen
+            ]
+            return questions[:max_questions_per_doc]
+        if store is None or live_fallback:
+            return self.load_questions(
+                item["file"], keyword=topic, limit=max_questions_per_doc, seen=seen
             )
+        return None
+    
+    def seen_set(self, student: Optional[str]) -> Optional[SeenSet]:
+        """学员的已用题目集合（builder.py --student 记录）；未指定学员时返回 None"""
+        return get_seen_set(student) if student else None
+    
+    def has_unseen(self, item: Dict, topic: Optional[str], seen: SeenSet) -> bool:
+        """
+        文档中是否还有学员没用过的匹配题目
+        
+        只查题目库和题目缓存，不加载docx；两者都没有该文档时无法判断，视为有。
+        """
+        if self.question_store is not None and self.question_store.has_file(item["id"]):
+            questions = [q["content"] for q in self.question_store.questions_for(item["id"], keyword=topic)]
+        else:
+            questions = self.question_cache.get(item["file"]) if self.question_cache else None
+            if questions is None:
+                return True
+            if topic:
+                topic_lower = topic.lower()
+                questions = [q for q in questions if topic_lower in q.lower()]
+        return any(q not in seen for q in questions)
+    
+    def drop_exhausted(
+        self,
+        results: List[Dict],
+        topic: Optional[str],
+        seen: Optional[SeenSet]
+    ) -> List[Dict]:
+        """去掉匹配题目已全部被学员用过的文档（排名阶段，避免它们占用候选名额）"""
+        if seen is None:
+            return results
+        return [item for item in results if self.has_unseen(item, topic, seen)]
+    
+    @staticmethod
+    def iter_fetched(
+        items: Iterable[Dict],
+        fetch: Callable[[Dict], object],
+        prefetch: int = 1,
+        deadline: Optional[float] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> Iterator[Tuple[Dict, object, Optional[Exception]]]:
+        """
+        按输入顺序产出每个索引项的加载结果
+        
+        prefetch > 1 时用线程池并发加载，最多 prefetch 个任务同时进行；消费方每取走
+        一个结果就补交下一个任务。生成器关闭（例如已凑够题目而提前退出）时，
+        尚未开始的任务会被取消，正在进行的任务结果被丢弃。
+        
+        Args:
+            deadline: time.monotonic() 截止时间，到期后不再等待，直接结束迭代
+            cancel: 取消事件，被设置后尽快结束迭代
+        
+        Yields:
+            (item, result, error)：加载失败时 result 为 None，error 为异常
+        """
+        def stopped():
+            return ((cancel is not None and cancel.is_set())
+                    or (deadline is not None and time.monotonic() >= deadline))
+        
+        if prefetch <= 1:
+            for item in items:
+                if stopped():
+                    return
+                try:
+                    yield item, fetch(item), None
+                except Exception as e:
+                    yield item, None, e
+            return
+        
+        items = iter(items)
+        executor = ThreadPoolExecutor(max_workers=prefetch)
+        pending = deque()
+        try:
+            for item in items:
+                pending.append((item, executor.submit(fetch, item)))
+                if len(pending) >= prefetch:
+                    break
             
-            if is_question_start and current_question:
-                # 保存上一题
-                full_question = '\n'.join(current_question)
-                if not keyword or keyword.lower() in full_question.lower():
-                    questions.append(full_question)
-                current_question = []
-            
-            current_question.append(text)
+            while pending:
+                item, future = pending.popleft()
+                # 分段等待，以便及时响应取消和截止时间
+                while not future.done():
+                    if stopped():
+                        pending.appendleft((item, future))
+                        return
+                    timeout = FETCH_POLL_INTERVAL
+                    if deadline is not None:
+                        timeout = min(timeout, max(deadline - time.monotonic(), 0))
+                    wait([future], timeout=timeout)
+                try:
+                    result, error = future.result(), None
+                except Exception as e:
+                    result, error = None, e
+                
+                next_item = next(items, None)
+                if next_item is not None:
+                    pending.append((next_item, executor.submit(fetch, next_item)))
+                
+                yield item, result, error
+        finally:
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+    
+    def topic_candidates(
+        self,
+        topic: str,
+        district: Optional[str],
+        year: Optional[str],
+        max_docs: int,
+        ranking: str = "default",
+        collapse_duplicates: bool = True,
+        seen: Optional[SeenSet] = None
+    ) -> List[Dict]:
+        """
+        smart_search 的索引阶段：按主题搜索候选文件（多搜一些以便筛选）
+        
+        有重复检测结果时多取一倍候选，合并重复试卷后再截取，避免重复内容占用名额；
+        指定了学员已用题目集合时同样多取一倍，去掉题目已全部用过的文档。
+        """
+        print(f"\n🔍 搜索: topic='{topic}', district='{district}', year='{year}'")
         
-        # 处理最后一题
-        if current_question:
-            full_question = '\n'.join(current_question)
-            if not keyword or keyword.lower() in full_question.lower():
-                questions.append(full_question)
+        limit = max_docs * 2
+        collapse = collapse_duplicates and self.duplicates is not None
+        fetch_limit = limit * (2 if collapse else 1) * (2 if seen is not None else 1)
+        search = {"bm25": self.search_bm25, "tfidf": self.search_similar}.get(ranking, self.search)
+        results = search(
+            keyword=topic,
+            district=district,
+            year=year,
+            limit=fetch_limit
+        )
+        if collapse:
+            unique = self.collapse_duplicates(results)
+            if len(unique) < len(results):
+                print(f"   合并重复: {len(results) - len(unique)} 个文件")
+            results = unique
+        if seen is not None:
+            fresh = self.drop_exhausted(results, topic, seen)
+            if len(fresh) < len(results):
+                print(f"   跳过已用过: {len(results) - len(fresh)} 个文件")
+            results = fresh
+        results = results[:limit]
         
-        return questions
+        if not results:
+            print("⚠️ 未找到匹配结果")
+        else:
+            print(f"   索引匹配: {len(results)} 个文件")
+        return results
+    
+    def collapse_duplicates(self, results: List[Dict]) -> List[Dict]:
+        """
+        合并重复试卷：同一重复组只保留一个，占用组内排名最靠前的成员的位置
+        
+        保留的是重复组的规范来源（组中心，见 MinHashIndex.canonical_of），
+        不随查询、排序方式变化；规范来源不在结果中（被筛选条件排除）时才保留
+        排名最靠前的成员。没有重复检测结果时原样返回。
+        """
+        if self.duplicates is None:
+            return results
+        by_id = {item["id"]: item for item in results}
+        kept = set()
+        unique = []
+        for item in results:
+            key = self.duplicates.duplicate_key(item["id"])
+            if key in kept:
+                continue
+            kept.add(key)
+            unique.append(by_id.get(self.duplicates.canonical_of(item["id"]), item))
+        return unique
+    
+    def get_items(self, file_ids: Iterable[int]) -> List[Dict]:
+        """按 id 取回索引项（保持输入顺序，跳过不存在的 id）"""
+        file_ids = list(file_ids)
+        if self.backend_index is not None:
+            found = self.backend_index.items_by_id(file_ids)
+            return [found[i] for i in file_ids if i in found]
+        return [self.index[self.positions[i]] for i in file_ids if i in self.positions]
+    
+    def more_like_this(
+        self,
+        file_id: int,
+        limit: int = 5,
+        min_similarity: float = 0.3,
+        level: str = "paper"
+    ) -> List[Dict]:
+        """
+        查找与指定试卷内容相近的其他试卷
+        
+        Args:
+            file_id: 索引中的文件 id
+            limit: 最多返回的文件数
+            min_similarity: 估计 Jaccard 相似度下限（仅 level="paper"）
+            level: "paper" 按 MinHash 估计的全文相似度；"question" 按共用的重复题目数
+                   （如同一篇阅读，需要 indexer.py --dedup --questions）
+        
+        Returns:
+            按相似度（或共用题目数）降序的索引项列表；未运行 indexer.py --dedup 时返回空列表
+        """
+        if level not in ("paper", "question"):
+            raise ValueError(f"未知的相似级别: {level}")
+        if self.duplicates is None:
+            print("⚠️ 重复检测不可用（运行 indexer.py --dedup 可生成）")
+            return []
+        if level == "question":
+            similar = self.duplicates.sharing_questions(file_id, limit=limit)
+        else:
+            similar = self.duplicates.similar(file_id, limit=limit, min_similarity=min_similarity)
+        return self.get_items(other for other, _ in similar)
+    
+    def question_dedup_enabled(self, collapse_duplicates: bool) -> bool:
+        """是否跳过重复题目（需要 indexer.py --dedup --questions 生成的题目重复组）"""
+        return (collapse_duplicates and self.duplicates is not None
+                and bool(self.duplicates.question_groups))
+    
+    def drop_repeated(self, questions: List[str], selected: Set[int], limit: int) -> List[str]:
+        """
+        去掉与已选来源中的题目重复的题目，保留前 limit 道，并把它们的重复组记入 selected
+        
+        selected 是同一次搜索中已选题目所在的题目重复组编号（原地更新）。
+        """
+        kept = []
+        groups = []
+        for q in questions:
+            group = self.duplicates.question_group(q)
+            if group is not None and group in selected:
+                continue
+            kept.append(q)
+            if group is not None:
+                groups.append(group)
+            if len(kept) >= limit:
+                break
+        selected.update(groups)
+        return kept
+    
+    def iter_loaded(
+        self,
+        results: List[Dict],
+        topic: str,
+        max_docs: int = 3,
+        max_questions_per_doc: int = 5,
+        use_store: bool = True,
+        live_fallback: bool = True,
+        prefetch: int = 4,
+        deadline: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+        seen: Optional[SeenSet] = None,
+        collapse_duplicates: bool = True
+    ) -> Iterator[Tuple[Dict, List[Dict]]]:
+        """
+        smart_search 的加载阶段：按排名顺序产出成功加载的文档及其题目记录
+        
+        从题目库读取或按需加载文档（iter_fetched 并发预取），凑够 max_docs 个文档即停止。
+        指定 seen 时跳过已用过的题目，没有新题目的文档不计入 max_docs。
+        有题目重复组时（collapse_duplicates）跳过已在前面文档中选过的重复题目，
+        匹配题目全部重复的文档同样不计入 max_docs。
+        
+        Yields:
+            (索引项, 题目记录列表)，记录含 content/source/file
+        """
+        question_dedup = self.question_dedup_enabled(collapse_duplicates)
+        fetch_limit = max_questions_per_doc * (QUESTION_DEDUP_HEADROOM if question_dedup else 1)
+        selected = set()
+        
+        def fetch(item):
+            return self.fetch_questions(
+                item, topic, fetch_limit, use_store, live_fallback, seen
+            )
+        
+        loaded_count = 0
+        fetched = self.iter_fetched(
+            results, fetch, prefetch=min(prefetch, max_docs), deadline=deadline, cancel=cancel
+        )
+        try:
+            for item, questions, error in fetched:
+                if error is not None:
+                    print(f"   加载失败: {item['filename']} - {error}")
+                    continue
+                if questions is None or (seen is not None and not questions):
+                    continue
+                if question_dedup:
+                    unique = self.drop_repeated(questions, selected, max_questions_per_doc)
+                    if questions and not unique:
+                        print(f"   跳过重复题目: {item['filename']}")
+                        continue
+                    questions = unique
+                loaded_count += 1
+                
+                # 添加来源标注
+                source = f"({item['year']} {item['district']}{item['exam_type']})"
+                yield item, [
+                    {"content": q, "source": source, "file": item["filename"]}
+                    for q in questions
+                ]
+                
+                if loaded_count >= max_docs:
+                    break
+        finally:
+            fetched.close()
     
     def smart_search(
         self,
@@ -162,7 +882,13 @@ class QuestionBankSearcher:
         year: Optional[str] = None,
         load_docs: bool = True,
         max_docs: int = 3,
-        max_questions_per_doc: int = 5
+        max_questions_per_doc: int = 5,
+        use_store: bool = True,
+        live_fallback: bool = True,
+        ranking: str = "default",
+        prefetch: int = 4,
+        collapse_duplicates: bool = True,
+        student: Optional[str] = None
     ) -> Tuple[List[Dict], List[str]]:
         """
         智能搜索 - 搜索索引并可选加载文档
@@ -174,85 +900,478 @@ class QuestionBankSearcher:
             load_docs: 是否加载文档内容
             max_docs: 最多加载的文档数量
             max_questions_per_doc: 每个文档提取的最大题目数
+            use_store: 优先从预切分题目库（indexer.py --questions）读取题目
+            live_fallback: 题目库中没有该文件时是否回退到加载docx
+            ranking: 排序方式，"default"（年份、文件大小）、"bm25"（相关度+年份）
+                     或 "tfidf"（字符 n-gram 余弦相似度，可找到不含关键词原文的相关试卷）
+            prefetch: 并发加载的文档数上限（1 为逐个加载）；结果顺序不受影响
+            collapse_duplicates: 合并重复试卷（需要 indexer.py --dedup），同一内容只加载一次；
+                                 有题目重复组时（--dedup --questions）还跳过前面文档中已选过的
+                                 重复题目，题目全部重复的文档不计入 max_docs
+            student: 学员标识；跳过该学员已用过的题目（builder.py --student 记录）
         
         Returns:
             (索引结果列表, 题目内容列表)
         """
-        print(f"\n🔍 搜索: topic='{topic}', district='{district}', year='{year}'")
+        seen = self.seen_set(student)
         
         # 1. 搜索索引
-        results = self.search(
-            keyword=topic,
-            district=district,
-            year=year,
-            limit=max_docs * 2  # 多搜一些以便筛选
+        results = self.topic_candidates(
+            topic, district, year, max_docs, ranking, collapse_duplicates, seen
         )
-        
         if not results:
-            print("⚠️ 未找到匹配结果")
             return [], []
         
-        print(f"   索引匹配: {len(results)} 个文件")
-        
         if not load_docs:
             return results, []
         
-        # 2. 按需加载文档并提取内容
+        # 2. 从题目库读取或按需加载文档并提取内容（按排名顺序消费，凑够即停止）
         all_questions = []
         loaded_count = 0
+        for _, records in self.iter_loaded(
+            results, topic, max_docs, max_questions_per_doc, use_store, live_fallback, prefetch,
+            seen=seen, collapse_duplicates=collapse_duplicates
+        ):
+            loaded_count += 1
+            all_questions.extend(records)
         
-        for item in results:
-            if loaded_count >= max_docs:
-                break
-            
-            try:
-                # 加载文档
-                doc = self.load_document(item["file"])
+        print(f"   已加载: {loaded_count} 个文件, 提取 {len(all_questions)} 道题目")
+        
+        return results[:max_docs], all_questions
+    
+    def iter_smart_search(
+        self,
+        topic: str,
+        district: Optional[str] = None,
+        year: Optional[str] = None,
+        max_docs: int = 3,
+        max_questions_per_doc: int = 5,
+        use_store: bool = True,
+        live_fallback: bool = True,
+        ranking: str = "default",
+        prefetch: int = 4,
+        time_budget: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+        collapse_duplicates: bool = True,
+        student: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """
+        流式智能搜索 - 每提取出一个文档的题目就立即产出，不等其余文档加载完
+        
+        产出的记录与 smart_search 返回的题目列表顺序、内容相同（未超时、未取消时）。
+        调用方凑够需要的题目后直接停止迭代（或 close()），尚未开始的加载会被取消；
+        也可以从其他线程设置 cancel 事件来中止。
+        
+        使用示例:
+            for record in searcher.iter_smart_search("非谓语", time_budget=2.0):
+                slots.append(record)
+                if len(slots) >= 3:
+                    break
+        
+        Args:
+            topic/district/year/max_docs/max_questions_per_doc/use_store/live_fallback/
+            ranking/prefetch/collapse_duplicates/student: 与 smart_search 相同
+            time_budget: 本次调用的时间预算（秒），到期后不再等待尚未加载完的文档
+            cancel: 取消事件，被设置后尽快停止产出
+        
+        Yields:
+            题目记录 {content, source, file}
+        """
+        deadline = time.monotonic() + time_budget if time_budget is not None else None
+        seen = self.seen_set(student)
+        
+        results = self.topic_candidates(
+            topic, district, year, max_docs, ranking, collapse_duplicates, seen
+        )
+        loaded = self.iter_loaded(
+            results, topic, max_docs, max_questions_per_doc, use_store, live_fallback,
+            prefetch, deadline=deadline, cancel=cancel, seen=seen,
+            collapse_duplicates=collapse_duplicates
+        )
+        try:
+            for _, records in loaded:
+                for record in records:
+                    if cancel is not None and cancel.is_set():
+                        return
+                    yield record
+        finally:
+            loaded.close()
+        
+        if deadline is not None and time.monotonic() >= deadline:
+            print("⏱️ 时间预算已用完，停止加载其余文档")
+    
+    def batch_search(
+        self,
+        queries: List[Dict],
+        load_docs: bool = True,
+        use_store: bool = True,
+        live_fallback: bool = True,
+        prefetch: int = 4,
+        collapse_duplicates: bool = True,
+        student: Optional[str] = None
+    ) -> List[Tuple[List[Dict], List[Dict]]]:
+        """
+        批量智能搜索 - 多个主题共用一次索引扫描和一次文档加载
+        
+        每个查询的结果与单独调用 smart_search（默认排序）相同，但：
+        - JSON 后端只按排名顺序扫描一遍各查询候选的并集，所有主题关键词用
+          MultiPatternMatcher 一次匹配，每个查询凑够候选即退出，全部凑够时停止扫描
+        - 多个查询命中的同一文档只加载一次；文档的全部题目也只对所有主题匹配一遍，
+          再分发给各个查询
+        SQLite/列式后端的索引查询下推到各自的 search()，文档加载同样去重。
+        
+        Args:
+            queries: 查询列表，每项为字典：topic（必填）、district、year、exam_type、
+                     question_type、max_docs（默认3）、max_questions_per_doc（默认5）
+            load_docs: 是否加载文档内容
+            use_store: 优先从预切分题目库读取题目
+            live_fallback: 题目库中没有该文件时是否回退到加载docx
+            prefetch: 并发加载的文档数上限
+            collapse_duplicates: 合并重复试卷、跳过重复题目（与 smart_search 相同）
+            student: 学员标识；跳过该学员已用过的题目（与 smart_search 相同）
+        
+        Returns:
+            与 queries 一一对应的 (索引结果列表, 题目内容列表)
+        """
+        print(f"\n🔍 批量搜索: {len(queries)} 个主题")
+        topics = [query.get("topic") or "" for query in queries]
+        matcher = MultiPatternMatcher(topics)
+        seen = self.seen_set(student)
+        
+        # 1. 索引：各查询候选（多搜一些以便筛选，与 smart_search 相同）
+        hits = self.batch_index_pass(queries, matcher, collapse_duplicates, seen)
+        for query, results in zip(queries, hits):
+            print(f"   '{query.get('topic')}' 索引匹配: {len(results)} 个文件")
+        
+        if not load_docs:
+            return [(results, []) for results in hits]
+        
+        # 2. 文档：预计需要的文档（各查询前 max_docs 个）去重后并发加载，
+        #    其余的在前面的文档加载失败时按需补充
+        loaded = {}
+        
+        def fetch(item):
+            questions = self.fetch_questions(item, None, None, use_store, live_fallback)
+            if questions is None:
+                return None
+            # 每道题只匹配一次，得到它包含的主题下标；已用过的题目直接丢弃
+            return [(q, matcher.find_all(q)) for q in questions if seen is None or q not in seen]
+        
+        def remember(item, result, error):
+            loaded[item["file"]] = (result, error)
+            if error is not None:
+                print(f"   加载失败: {item['filename']} - {error}")
+        
+        planned = {}
+        for query, results in zip(queries, hits):
+            for item in results[:query.get("max_docs", 3)]:
+                planned.setdefault(item["file"], item)
+        fetched = self.iter_fetched(planned.values(), fetch, prefetch=prefetch)
+        try:
+            for item, result, error in fetched:
+                remember(item, result, error)
+        finally:
+            fetched.close()
+        
+        # 3. 按查询组装结果（跳过重复题目的方式与 iter_loaded 相同，各查询分别计算）
+        question_dedup = self.question_dedup_enabled(collapse_duplicates)
+        batch = []
+        for i, (query, results) in enumerate(zip(queries, hits)):
+            max_docs = query.get("max_docs", 3)
+            max_questions = query.get("max_questions_per_doc", 5)
+            all_questions = []
+            loaded_count = 0
+            selected = set()
+            for item in results:
+                if loaded_count >= max_docs:
+                    break
+                if item["file"] not in loaded:
+                    for _, result, error in self.iter_fetched([item], fetch):
+                        remember(item, result, error)
+                questions, error = loaded[item["file"]]
+                if error is not None or questions is None:
+                    continue
+                matching = [q for q, found in questions if not topics[i] or i in found]
+                if seen is not None and not matching:
+                    continue
+                if question_dedup:
+                    unique = self.drop_repeated(
+                        matching[:max_questions * QUESTION_DEDUP_HEADROOM], selected, max_questions
+                    )
+                    if matching and not unique:
+                        continue
+                    matching = unique
                 loaded_count += 1
                 
-                # 提取题目
-                questions = self.extract_questions(doc, keyword=topic)
-                
-                # 添加来源标注
-                for q in questions[:max_questions_per_doc]:
-                    source = f"({item['year']} {item['district']}{item['exam_type']})"
+                source = f"({item['year']} {item['district']}{item['exam_type']})"
+                for q in matching[:max_questions]:
                     all_questions.append({
                         "content": q,
                         "source": source,
                         "file": item["filename"]
                     })
-                
-            except Exception as e:
-                print(f"   加载失败: {item['filename']} - {e}")
-                continue
+            batch.append((results[:max_docs], all_questions))
         
-        print(f"   已加载: {loaded_count} 个文件, 提取 {len(all_questions)} 道题目")
+        print(f"   已加载: {len(loaded)} 个文件（去重后）")
+        return batch
+    
+    def batch_index_pass(
+        self,
+        queries: List[Dict],
+        matcher: MultiPatternMatcher,
+        collapse_duplicates: bool = True,
+        seen: Optional[SeenSet] = None
+    ) -> List[List[Dict]]:
+        """
+        batch_search 的索引阶段：求出每个查询的前 max_docs*2 个候选
         
-        return results[:max_docs], all_questions
+        合并重复试卷、跳过已用过的文档的方式与 topic_candidates 相同（多取候选，筛选后截取）。
+        
+        Returns:
+            与 queries 一一对应的索引项列表（顺序与 search() 相同）
+        """
+        limits = [query.get("max_docs", 3) * 2 for query in queries]
+        collapse = collapse_duplicates and self.duplicates is not None
+        if not collapse and seen is None:
+            return self.scan_queries(queries, matcher, limits)
+        factor = (2 if collapse else 1) * (2 if seen is not None else 1)
+        hits = self.scan_queries(queries, matcher, [limit * factor for limit in limits])
+        if collapse:
+            hits = [self.collapse_duplicates(results) for results in hits]
+        return [
+            self.drop_exhausted(results, query.get("topic"), seen)[:limit]
+            for query, results, limit in zip(queries, hits, limits)
+        ]
+    
+    def scan_queries(
+        self,
+        queries: List[Dict],
+        matcher: MultiPatternMatcher,
+        limits: List[int]
+    ) -> List[List[Dict]]:
+        """
+        一次扫描求出每个查询的前 limit 个匹配（JSON 后端；其他后端逐个查询）
+        """
+        if self.backend_index is not None:
+            return [
+                self.search(
+                    keyword=query.get("topic"),
+                    year=query.get("year"),
+                    district=query.get("district"),
+                    exam_type=query.get("exam_type"),
+                    question_type=query.get("question_type"),
+                    limit=limit
+                )
+                for query, limit in zip(queries, limits)
+            ]
+        
+        # 各查询的分面条件和倒排候选；候选并集决定扫描范围
+        conditions = []
+        union = set()
+        scan_all = False
+        for query in queries:
+            facets = [(facet, query[facet]) for facet in FACETS if query.get(facet)]
+            conditions.append(facets)
+            positions = self.candidate_positions(
+                query.get("topic"), query.get("year"), query.get("district"),
+                query.get("exam_type"), query.get("question_type")
+            )
+            if positions is None:
+                scan_all = True
+            else:
+                union |= positions
+        candidates = self.rank_order if scan_all else sorted(union, key=self.rank.__getitem__)
+        
+        hits = [[] for _ in queries]
+        open_queries = [i for i, limit in enumerate(limits) if limit > 0]
+        for pos in candidates:
+            if not open_queries:
+                break
+            item = self.index[pos]
+            found = None
+            for i in open_queries:
+                if any(item.get(facet) != value for facet, value in conditions[i]):
+                    continue
+                if queries[i].get("topic"):
+                    if found is None:
+                        found = (matcher.find_all(item.get("filename", ""))
+                                 | matcher.find_all(item.get("preview", "")))
+                    if i not in found:
+                        continue
+                hits[i].append(item)
+            open_queries = [i for i in open_queries if len(hits[i]) < limits[i]]
+        
+        return hits
+
+def index_signature(backend: str = "json") -> Tuple:
+    """
+    索引相关文件的 (路径, 修改时间, 大小) 签名，用于检测磁盘上的索引是否更新
+    """
+    paths = {
+        "json": [INDEX_FILE, INVERTED_INDEX_FILE, VECTOR_INDEX_FILE],
+        "sqlite": [SQLITE_INDEX_FILE],
+        "columnar": [COLUMNAR_INDEX_FILE],
+    }[backend] + [QUESTION_STORE_FILE, MINHASH_FILE]
+    
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+class SharedSearcher:
+    """
+    进程内共享的搜索器
+    
+    索引只加载一次；每隔 check_interval 秒检查一次索引文件签名，发现变化后
+    在后台线程构建新的 QuestionBankSearcher 并原子替换。替换前的查询继续
+    使用旧实例，不会被阻塞；重新加载失败时保留旧索引，下次检查时重试。
+    """
+    
+    def __init__(self, backend: str = "json", check_interval: float = 1.0):
+        self.backend = backend
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.reloading = False
+        self.signature = index_signature(backend)
+        self.searcher = QuestionBankSearcher(backend=backend)
+        self.last_check = time.monotonic()
+    
+    def get(self) -> QuestionBankSearcher:
+        """返回当前搜索器，必要时触发后台重新加载"""
+        now = time.monotonic()
+        if now - self.last_check >= self.check_interval:
+            self.last_check = now
+            self.check_for_changes()
+        return self.searcher
+    
+    def check_for_changes(self) -> bool:
+        """
+        检查索引文件是否变化
+        
+        Returns:
+            是否启动了后台重新加载
+        """
+        signature = index_signature(self.backend)
+        with self.lock:
+            if self.reloading or signature == self.signature:
+                return False
+            self.reloading = True
+        
+        threading.Thread(target=self.reload, args=(signature,), daemon=True).start()
+        return True
+    
+    def reload(self, signature: Tuple):
+        """构建新的搜索器并替换当前实例（在后台线程中运行）"""
+        try:
+            searcher = QuestionBankSearcher(backend=self.backend)
+        except Exception as e:
+            print(f"⚠️ 索引重新加载失败，继续使用旧索引: {e}")
+        else:
+            self.searcher = searcher
+            self.signature = signature
+            print("🔄 检测到索引更新，已重新加载")
+        finally:
+            with self.lock:
+                self.reloading = False
+
+_shared_searchers = {}
+_shared_lock = threading.Lock()
+
+def get_shared_searcher(backend: str = "json") -> QuestionBankSearcher:
+    """
+    获取进程内共享的搜索器（首次调用时加载索引，之后自动检测索引更新）
+    
+    使用示例:
+        searcher = get_shared_searcher()
+        results = searcher.search(keyword="非谓语")
+    
+    Raises:
+        ValueError: 未知的索引后端
+    """
+    check_backend(backend)
+    with _shared_lock:
+        shared = _shared_searchers.get(backend)
+        if shared is None:
+            shared = _shared_searchers[backend] = SharedSearcher(backend=backend)
+    return shared.get()
+
+# 守护进程暴露的搜索方法，均可带 backend 参数选择索引后端
+DAEMON_METHODS = ("search", "search_bm25", "search_similar", "smart_search", "batch_search", "facets")
+
+def serve(socket_path: str = SEARCH_SOCKET, backends: Iterable[str] = ("json",)):
+    """
+    以守护进程方式运行搜索服务（阻塞）
+    
+    启动时预先加载各后端的共享搜索器，之后的请求直接使用常驻的索引和题目缓存，
+    索引文件更新时由 SharedSearcher 自动重新加载。
+    
+    Args:
+        socket_path: Unix 域套接字路径
+        backends: 预先加载的索引后端
+    """
+    for backend in backends:
+        get_shared_searcher(backend)
+    
+    def method(name):
+        def call(backend: str = "json", **params):
+            return getattr(get_shared_searcher(backend), name)(**params)
+        return call
+    
+    search_daemon.serve(socket_path, {name: method(name) for name in DAEMON_METHODS})
 
 # 便捷函数
 def search_question_bank(
     topic: str,
     district: Optional[str] = None,
     year: Optional[str] = None,
-    load_content: bool = True
+    load_content: bool = True,
+    backend: str = "json",
+    ranking: str = "default",
+    use_daemon: bool = True,
+    student: Optional[str] = None,
+    daemon_timeout: float = 30.0
 ) -> Tuple[List[Dict], List[str]]:
     """
     快速搜索题库
     
     使用示例:
         results, questions = search_question_bank("非谓语", "嘉定", "2025")
+    
+    搜索服务（python scripts/searcher.py serve）在运行时把请求转交给它，
+    否则在本进程内搜索；同一进程内多次调用共享同一个搜索器，索引只加载一次。
+    搜索服务无法连接、超过 daemon_timeout 秒未应答或处理出错（如索引缺失）时，
+    同样退回本进程内搜索。指定 student 时跳过该学员已用过的题目。
     """
-    searcher = QuestionBankSearcher()
-    return searcher.smart_search(
-        topic=topic,
-        district=district,
-        year=year,
-        load_docs=load_content
-    )
+    check_backend(backend)
+    params = {
+        "topic": topic,
+        "district": district,
+        "year": year,
+        "load_docs": load_content,
+        "ranking": ranking,
+        "student": student
+    }
+    if use_daemon and os.path.exists(SEARCH_SOCKET):
+        try:
+            results, questions = search_daemon.request(
+                SEARCH_SOCKET, "smart_search", dict(params, backend=backend), timeout=daemon_timeout
+            )
+            return results, questions
+        except search_daemon.DaemonUnavailable:
+            pass
+        except (search_daemon.DaemonError, OSError, ValueError) as e:
+            # 超时（socket.timeout 是 OSError）、服务端出错或应答损坏：不中断调用方，改在本进程内搜索
+            print(f"⚠️ 搜索服务请求失败，改为本进程内搜索: {e}")
+    
+    searcher = get_shared_searcher(backend)
+    return searcher.smart_search(**params)
 
-if __name__ == "__main__":
-    # 测试代码
+def run_self_test():
+    """测试代码"""
     print("=" * 50)
     print("题库搜索测试")
     print("=" * 50)
@@ -281,3 +1400,32 @@ if __name__ == "__main__":
         for i, q in enumerate(questions[:2], 1):
             print(f"\n题目 {i} {q['source']}:")
             print(q['content'][:200] + "...")
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="题库搜索")
+    subparsers = arg_parser.add_subparsers(dest="command")
+    serve_parser = subparsers.add_parser("serve", help="以守护进程方式运行，常驻索引和题目缓存")
+    serve_parser.add_argument("--socket", default=SEARCH_SOCKET,
+                              help=f"Unix 域套接字路径（默认 {SEARCH_SOCKET}）")
+    serve_parser.add_argument("--backend", action="append", choices=BACKENDS,
+                              help="启动时预先加载的索引后端，可重复（默认 json）")
+    serve_parser.add_argument("--cache-memory-mb", type=float, default=None,
+                              help=f"题目缓存内存预算 MB（默认 {DEFAULT_MEMORY_BUDGET // (1024 * 1024)}）")
+    serve_parser.add_argument("--cache-disk-mb", type=float, default=None,
+                              help=f"题目缓存磁盘预算 MB，0 表示不用磁盘缓存（默认 {DEFAULT_DISK_BUDGET // (1024 * 1024)}）")
+    args = arg_parser.parse_args()
+    
+    if args.command == "serve":
+        configure_question_cache(
+            memory_budget=None if args.cache_memory_mb is None else int(args.cache_memory_mb * 1024 * 1024),
+            disk_budget=None if args.cache_disk_mb is None else int(args.cache_disk_mb * 1024 * 1024)
+        )
+        try:
+            serve(args.socket, args.backend or ["json"])
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        except KeyboardInterrupt:
+            pass
+    else:
+        run_self_test()
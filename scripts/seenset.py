@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Per-Student Seen Set
+每个学员已用过的题目指纹集合（可扩展布隆过滤器），持久化在 SEEN_DIR/<学员>.bloom
+
+- 指纹：题目文本去掉空白、转小写后的 SHA-1，排版差异不影响判断
+- 布隆过滤器：固定 k 次哈希，查询和插入与已记录的题目数量无关；
+  写满一层后追加一层容量翻倍、误判率减半的新层，总误判率不超过 ERROR_RATE
+- builder 记录实际插入文档的内容，searcher 搜索时跳过已用过的题目
+
+文件布局:
+    magic(4) | version(u32) | header_len(u32) | header JSON | 各层位数组
+"""
+
+import os
+import re
+import json
+import math
+import struct
+import hashlib
+import threading
+
+RESOURCE_PATH = "/Users/xielk/webdata/english/lesson/resource"
+SEEN_DIR = os.path.join(RESOURCE_PATH, ".seen")
+
+MAGIC = b"QBSF"
+FORMAT_VERSION = 1
+PREAMBLE = struct.Struct("<4sII")
+
+# 第一层的容量；各层误判率依次减半，总误判率不超过 ERROR_RATE
+INITIAL_CAPACITY = 4096
+ERROR_RATE = 0.001
+
+# 插入内容中连续多少行以内的片段参与记录（单道题的最大行数）
+MAX_QUESTION_LINES = 20
+
+WHITESPACE = re.compile(r'\s+')
+UNSAFE_CHARS = re.compile(r'[^\w\-]')
+
+def fingerprint(text):
+    """题目指纹：去掉空白、转小写后的 SHA-1 摘要"""
+    normalized = WHITESPACE.sub("", text).lower()
+    return hashlib.sha1(normalized.encode("utf-8")).digest()
+
+def content_fingerprints(text):
+    """
+    一段插入内容对应的全部指纹：整段文本，以及其中所有连续的行片段（不超过 MAX_QUESTION_LINES 行）
+
+    插入的内容可能是多道题拼在一起，而题目切分的边界取决于原文档的上下文
+    （如不带题号的标题行会并入相邻的题），所以按行片段而不是按切分结果记录，
+    搜索时提取出的任何一道原文题目都能被识别。
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    prints = {fingerprint(text)}
+    for start in range(len(lines)):
+        for end in range(start + 1, min(start + MAX_QUESTION_LINES, len(lines)) + 1):
+            prints.add(fingerprint("".join(lines[start:end])))
+    return prints
+
+class _Layer:
+    """布隆过滤器的一层"""
+
+    def __init__(self, capacity, error_rate, bits=None, hashes=None, count=0, data=None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bits = bits or max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = hashes or max(1, int(round(self.bits / capacity * math.log(2))))
+        self.count = count
+        self.data = data if data is not None else bytearray((self.bits + 7) // 8)
+
+    def positions(self, digest):
+        # 双重哈希：h1 + i*h2
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def __contains__(self, digest):
+        data = self.data
+        return all(data[p >> 3] & (1 << (p & 7)) for p in self.positions(digest))
+
+    def add(self, digest):
+        for p in self.positions(digest):
+            self.data[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+class SeenSet:
+    """
+    学员已用题目的指纹集合（可扩展布隆过滤器）
+
+    只会误判"用过"（概率约 ERROR_RATE），不会漏判。
+    """
+
+    def __init__(self, path=None, layers=None):
+        self.path = path
+        self.layers = layers or [_Layer(INITIAL_CAPACITY, ERROR_RATE / 2)]
+
+    @classmethod
+    def open(cls, path):
+        """
+        读取集合文件；文件不存在时返回空集合（save 时创建）
+
+        Raises:
+            ValueError: 文件格式不正确
+        """
+        if not os.path.exists(path):
+            return cls(path)
+
+        with open(path, 'rb') as f:
+            raw = f.read()
+        magic, version, header_len = PREAMBLE.unpack_from(raw, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"已用题目记录格式不匹配: {path}")
+        header = json.loads(raw[PREAMBLE.size:PREAMBLE.size + header_len])
+
+        layers = []
+        offset = PREAMBLE.size + header_len
+        for meta in header["layers"]:
+            size = (meta["bits"] + 7) // 8
+            layers.append(_Layer(
+                meta["capacity"], meta["error_rate"], meta["bits"], meta["hashes"], meta["count"],
+                bytearray(raw[offset:offset + size])
+            ))
+            offset += size
+        return cls(path, layers)
+
+    def __len__(self):
+        """已记录的指纹数"""
+        return sum(layer.count for layer in self.layers)
+
+    def contains_digest(self, digest):
+        return any(digest in layer for layer in self.layers)
+
+    def __contains__(self, text):
+        """题目是否已用过"""
+        return self.contains_digest(fingerprint(text))
+
+    def add_digest(self, digest):
+        """
+        记录一个指纹
+
+        Returns:
+            是否为新指纹（已存在时不重复计数）
+        """
+        if self.contains_digest(digest):
+            return False
+        layer = self.layers[-1]
+        if layer.count >= layer.capacity:
+            layer = _Layer(layer.capacity * 2, layer.error_rate / 2)
+            self.layers.append(layer)
+        layer.add(digest)
+        return True
+
+    def add(self, text):
+        """记录一道题目"""
+        return self.add_digest(fingerprint(text))
+
+    def save(self, path=None):
+        """写入文件（先写临时文件再原子替换）"""
+        path = path or self.path
+        header = json.dumps({
+            "layers": [
+                {"capacity": l.capacity, "error_rate": l.error_rate, "bits": l.bits,
+                 "hashes": l.hashes, "count": l.count}
+                for l in self.layers
+            ]
+        }).encode("utf-8")
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+            f.write(header)
+            for layer in self.layers:
+                f.write(layer.data)
+        os.replace(tmp_path, path)
+
+def seen_path(student, seen_dir=None):
+    """学员对应的集合文件路径"""
+    name = UNSAFE_CHARS.sub("_", student.strip()) or "_"
+    return os.path.join(seen_dir or SEEN_DIR, name + ".bloom")
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def get_seen_set(student, seen_dir=None):
+    """
+    读取学员的已用题目集合（按文件修改时间缓存，builder 写入后自动重新读取）
+
+    Returns:
+        SeenSet；学员还没有记录时返回空集合
+    """
+    path = seen_path(student, seen_dir)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    seen = SeenSet.open(path)
+    with _cache_lock:
+        _cache[path] = (mtime, seen)
+    return seen
+
+def record_used(student, texts, seen_dir=None):
+    """
+    记录学员用过的内容（builder 插入文档后调用）
+
+    Args:
+        student: 学员标识
+        texts: 插入的文本列表（见 content_fingerprints）
+
+    Returns:
+        新记录的指纹数
+    """
+    path = seen_path(student, seen_dir)
+    seen = SeenSet.open(path)
+    added = 0
+    for text in texts:
+        if not text or not str(text).strip():
+            continue
+        for digest in content_fingerprints(str(text)):
+            added += seen.add_digest(digest)
+    if added:
+        seen.save()
+    return added
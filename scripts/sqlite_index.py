@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+SQLite Storage Backend for Question Bank Index
+题库索引的 SQLite 存储：类型化筛选列 + FTS5 全文表，筛选、关键词匹配和排序都在 SQL 中完成
+"""
+
+import os
+import json
+import sqlite3
+import threading
+
+SCHEMA_VERSION = 1
+
+# FTS5 trigram 分词器只能匹配不少于3个字符的片段
+FTS_MIN_CHARS = 3
+
+FACETS = ("year", "district", "exam_type", "question_type")
+
+SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE files (
+    id INTEGER PRIMARY KEY,
+    pos INTEGER NOT NULL,
+    file TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    year TEXT,
+    year_num INTEGER NOT NULL,
+    district TEXT,
+    exam_type TEXT,
+    question_type TEXT,
+    preview TEXT,
+    size_kb INTEGER NOT NULL,
+    item TEXT NOT NULL
+);
+CREATE INDEX files_rank ON files (year_num DESC, size_kb DESC, pos);
+CREATE INDEX files_district ON files (district, year_num DESC, size_kb DESC, pos);
+CREATE INDEX files_exam_type ON files (exam_type);
+CREATE INDEX files_question_type ON files (question_type);
+CREATE VIRTUAL TABLE files_fts USING fts5(
+    filename, preview,
+    content='files', content_rowid='id',
+    tokenize='trigram'
+);
+"""
+
+def year_number(year):
+    """年份排序值，与 QuestionBankSearcher.search 的排序规则一致"""
+    return int(year) if year and year.isdigit() else 0
+
+def write_sqlite_index(db_path, index_data):
+    """
+    将索引写入 SQLite 数据库
+
+    先写临时文件再原子替换，正在读取旧库的进程不受影响。
+
+    Args:
+        db_path: 数据库文件路径
+        index_data: 与 index.json 相同结构的索引数据
+    """
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?)",
+            [
+                ("schema_version", str(SCHEMA_VERSION)),
+                ("metadata", json.dumps(index_data.get("metadata", {}), ensure_ascii=False)),
+            ]
+        )
+        conn.executemany(
+            "INSERT INTO files (id, pos, file, filename, year, year_num, district, exam_type,"
+            " question_type, preview, size_kb, item) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    item["id"], pos, item["file"], item.get("filename", ""),
+                    item.get("year"), year_number(item.get("year", "0")),
+                    item.get("district"), item.get("exam_type"), item.get("question_type"),
+                    item.get("preview", ""), item.get("size_kb", 999999),
+                    json.dumps(item, ensure_ascii=False)
+                )
+                for pos, item in enumerate(index_data.get("files", []))
+            )
+        )
+        conn.execute("INSERT INTO files_fts (files_fts) VALUES ('rebuild')")
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, db_path)
+
+def _contains(text, keyword_lower):
+    """与 JSON 后端相同的子串语义（Python 的 lower，而不是 SQLite 仅限 ASCII 的 lower）"""
+    return text is not None and keyword_lower in text.lower()
+
+class SQLiteIndex:
+    """只读的 SQLite 索引，提供与 QuestionBankSearcher.search 相同语义的查询"""
+
+    def __init__(self, db_path):
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(
+                f"SQLite索引不存在: {db_path}\n"
+                "请先运行: python scripts/indexer.py --sqlite"
+            )
+
+        self.db_path = db_path
+        self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        self.conn.create_function("contains_lower", 2, _contains, deterministic=True)
+        self.lock = threading.Lock()
+
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        if meta.get("schema_version") != str(SCHEMA_VERSION):
+            raise ValueError(f"SQLite索引版本不匹配: {db_path}，请重新运行 indexer.py --sqlite")
+        self.metadata = json.loads(meta.get("metadata", "{}"))
+
+    def close(self):
+        self.conn.close()
+
+    def search(self, keyword=None, year=None, district=None, exam_type=None,
+               question_type=None, limit=10):
+        """
+        在数据库中搜索
+
+        Returns:
+            匹配的索引项列表（按年份降序、文件大小降序）
+        """
+        clauses = []
+        params = []
+
+        for column, value in (("year", year), ("district", district),
+                              ("exam_type", exam_type), ("question_type", question_type)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+
+        if keyword:
+            keyword_lower = keyword.lower()
+            if len(keyword) >= FTS_MIN_CHARS:
+                # FTS 短语查询先按三元组缩小范围，再做精确子串校验
+                clauses.append("id IN (SELECT rowid FROM files_fts WHERE files_fts MATCH ?)")
+                params.append('"' + keyword.replace('"', '""') + '"')
+            clauses.append("(contains_lower(filename, ?) OR contains_lower(preview, ?))")
+            params.extend([keyword_lower, keyword_lower])
+
+        sql = "SELECT item FROM files"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY year_num DESC, size_kb DESC, pos LIMIT ?"
+        params.append(limit)
+
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def items_by_id(self, file_ids):
+        """按 id 取回索引项 {id: 索引项}（不存在的 id 不包含在内）"""
+        file_ids = list(file_ids)
+        if not file_ids:
+            return {}
+        placeholders = ",".join("?" * len(file_ids))
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT id, item FROM files WHERE id IN ({placeholders})", file_ids
+            ).fetchall()
+        return {file_id: json.loads(item) for file_id, item in rows}
+
+    def facets(self):
+        """各分面取值的文件数 {分面: {取值: 文件数}}"""
+        result = {}
+        with self.lock:
+            for facet in FACETS:
+                rows = self.conn.execute(
+                    f"SELECT {facet}, COUNT(*) FROM files GROUP BY {facet} ORDER BY {facet}"
+                ).fetchall()
+                result[facet] = dict(rows)
+        return result
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Merged-cell-aware table grid
+一次扫描 w:tbl，得到去重后的单元格（w:tc 元素）及其合并范围，按 (行, 列) O(1) 寻址
+
+python-docx 的 row.cells 每次访问都重新展开 gridSpan/vMerge（纵向合并还要用 XPath
+逐行向上查找），逐行调用时大表格是平方级的。TableGrid 只扫描一遍，
+parser 的表格识别、文本提取和 builder 的填充都通过它访问单元格。
+
+行内单元格的展开规则与 python-docx 的 _Row.cells 相同：
+横向合并的单元格按跨越的列数重复，vMerge="continue" 的单元格替换为它所延续的起始单元格。
+扫描时直接读取 lxml 子元素和属性，不经过 python-docx 的 tcPr/gridSpan 属性访问器。
+"""
+
+from docx.oxml.ns import qn
+
+W_TR = qn("w:tr")
+W_TC = qn("w:tc")
+W_TRPR = qn("w:trPr")
+W_TCPR = qn("w:tcPr")
+W_GRID_BEFORE = qn("w:gridBefore")
+W_GRID_SPAN = qn("w:gridSpan")
+W_VMERGE = qn("w:vMerge")
+W_VAL = qn("w:val")
+
+def grid_before(tr):
+    """行首跳过的网格列数（w:trPr/w:gridBefore）"""
+    trPr = tr.find(W_TRPR)
+    if trPr is None:
+        return 0
+    before = trPr.find(W_GRID_BEFORE)
+    return 0 if before is None else int(before.get(W_VAL))
+
+def cell_props(tc):
+    """
+    单元格的 (跨列数, vMerge 取值)
+
+    vMerge 取值：没有 w:vMerge 时为 None，w:vMerge 不带 w:val 时为 "continue"
+    """
+    tcPr = tc.find(W_TCPR)
+    if tcPr is None:
+        return 1, None
+    span = tcPr.find(W_GRID_SPAN)
+    vmerge = tcPr.find(W_VMERGE)
+    return (
+        1 if span is None else int(span.get(W_VAL)),
+        None if vmerge is None else vmerge.get(W_VAL, "continue"),
+    )
+
+class TableGrid:
+    """
+    表格布局网格
+
+    Attributes:
+        tbl: w:tbl 元素（CT_Tbl）
+        cells: 去重后的单元格，按文档顺序
+        spans: {单元格: (起始行, 起始列, 跨行数, 跨列数)}
+    """
+
+    def __init__(self, tbl):
+        self.tbl = tbl
+        self.cells = []
+        self.spans = {}
+        self._rows = []      # 每行展开后的单元格（同 _Row.cells）
+        self._grid = []      # 每行 {网格列: 单元格}
+
+        above = None    # 上一行 {单元格起始列: 单元格}
+        for row_idx, tr in enumerate(tbl.iterchildren(W_TR)):
+            row = []
+            grid = {}
+            starts = {}
+            offset = grid_before(tr)
+            for tc in tr.iterchildren(W_TC):
+                span, vmerge = cell_props(tc)
+                if vmerge == "continue":
+                    root = above.get(offset) if above else None
+                    if root is None:
+                        # 上一行没有从同一列开始的单元格：交给 python-docx 抛出它自己的错误
+                        root = tc._tc_above
+                    top, left, _, col_span = self.spans[root]
+                    self.spans[root] = (top, left, row_idx - top + 1, col_span)
+                else:
+                    root = tc
+                    self.cells.append(tc)
+                    self.spans[tc] = (row_idx, offset, 1, span)
+                row.extend([root] * self.spans[root][3])
+                starts.setdefault(offset, root)
+                for col in range(offset, offset + span):
+                    grid.setdefault(col, root)
+                offset += span
+            self._rows.append(row)
+            self._grid.append(grid)
+            above = starts
+
+    def __len__(self):
+        """行数"""
+        return len(self._rows)
+
+    @property
+    def col_count(self):
+        """网格列数（w:tblGrid 中 w:gridCol 的个数）"""
+        return len(self.tbl.tblGrid.gridCol_lst)
+
+    def row_cells(self, row_idx):
+        """
+        一行展开后的单元格，与 python-docx 的 table.rows[row_idx].cells 一一对应
+
+        Returns:
+            w:tc 元素列表（合并的单元格重复出现）
+        """
+        return self._rows[row_idx]
+
+    def __iter__(self):
+        """逐行产出展开后的单元格"""
+        return iter(self._rows)
+
+    def cell(self, row_idx, col_idx):
+        """
+        网格位置 (行, 列) 上的单元格（合并区域内的任何位置都返回起始单元格）
+
+        Returns:
+            w:tc 元素；该位置没有单元格（行首 gridBefore、行尾 gridAfter）时返回 None
+        """
+        return self._grid[row_idx].get(col_idx)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Inverted Index for Question Bank
+文件名和预览文本的倒排索引：中文按单字+二元组切分，英文/数字按词切分；
+同时保存词频和文档长度，用于 BM25 相关度排序
+"""
+
+import os
+import re
+import json
+import math
+from bisect import bisect_left
+from collections import Counter
+
+INDEX_VERSION = 2
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 中文字符（基本区 + 扩展A）
+CJK_RUN = re.compile(r'[㐀-䶿一-鿿]+')
+WORD_RUN = re.compile(r'[a-z0-9]+')
+
+def term_counts(text):
+    """
+    切分文本并统计词频
+
+    Args:
+        text: 原始文本（内部会转为小写）
+
+    Returns:
+        Counter：中文单字与相邻二字组合，英文单词和数字
+    """
+    text = text.lower()
+    counts = Counter(WORD_RUN.findall(text))
+    for run in CJK_RUN.findall(text):
+        counts.update(run)
+        counts.update(run[i:i + 2] for i in range(len(run) - 1))
+    return counts
+
+def tokenize(text):
+    """切分文本为索引词项集合"""
+    return set(term_counts(text))
+
+def query_terms(keyword):
+    """
+    关键词的 BM25 查询词项：中文片段取二字组合（单字片段取单字），英文取完整单词
+    """
+    keyword = keyword.lower()
+    terms = set(WORD_RUN.findall(keyword))
+    for run in CJK_RUN.findall(keyword):
+        if len(run) == 1:
+            terms.add(run)
+        else:
+            terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+def build_postings(items, fields=("filename", "preview")):
+    """
+    为索引项构建倒排表和词频统计
+
+    Args:
+        items: 索引项列表（需包含 id）
+        fields: 参与索引的字段
+
+    Returns:
+        (postings, frequencies, doc_lengths):
+        {词项: 升序 id 列表}、{词项: 与 id 列表对齐的词频}、{id: 文档词项总数}
+    """
+    entries = {}
+    doc_lengths = {}
+    for item in sorted(items, key=lambda item: item["id"]):
+        counts = Counter()
+        for field in fields:
+            counts.update(term_counts(item.get(field, "")))
+        doc_lengths[item["id"]] = sum(counts.values())
+        for token, tf in counts.items():
+            entries.setdefault(token, []).append((item["id"], tf))
+
+    postings = {token: [doc_id for doc_id, _ in pairs] for token, pairs in entries.items()}
+    frequencies = {token: [tf for _, tf in pairs] for token, pairs in entries.items()}
+    return postings, frequencies, doc_lengths
+
+def write_inverted_index(path, postings, index_metadata, frequencies=None, doc_lengths=None):
+    """保存倒排索引（及 BM25 统计），记录对应 index.json 的创建时间用于一致性校验"""
+    data = {
+        "metadata": {
+            "version": INDEX_VERSION,
+            "index_created_at": index_metadata.get("created_at"),
+            "total_files": index_metadata.get("total_files", 0),
+            "total_terms": len(postings)
+        },
+        "postings": postings,
+        "frequencies": frequencies or {},
+        "doc_lengths": {str(doc_id): length for doc_id, length in (doc_lengths or {}).items()}
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+class InvertedIndex:
+    """倒排索引查询：用词项倒排表求交得到候选 id"""
+
+    def __init__(self, postings, frequencies=None, doc_lengths=None):
+        self.postings = postings
+        self.frequencies = frequencies or {}
+        self.doc_lengths = {int(doc_id): length for doc_id, length in (doc_lengths or {}).items()}
+        self.avg_doc_length = (
+            sum(self.doc_lengths.values()) / len(self.doc_lengths) if self.doc_lengths else 0.0
+        )
+        self.vocabulary = sorted(t for t in postings if WORD_RUN.fullmatch(t))
+
+    @property
+    def has_term_stats(self):
+        """是否带有 BM25 所需的词频和文档长度"""
+        return bool(self.doc_lengths)
+
+    @classmethod
+    def load(cls, path, index_metadata=None):
+        """
+        加载倒排索引文件
+
+        Args:
+            path: 倒排索引文件路径
+            index_metadata: index.json 的 metadata，用于校验是否过期
+
+        Returns:
+            InvertedIndex；文件不存在、版本不符或与 index.json 不一致时返回 None
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        meta = data.get("metadata", {})
+        if meta.get("version") != INDEX_VERSION:
+            return None
+        if index_metadata is not None and meta.get("index_created_at") != index_metadata.get("created_at"):
+            return None
+        return cls(data.get("postings", {}), data.get("frequencies"), data.get("doc_lengths"))
+
+    def _word_postings(self, fragment, left_bounded, right_bounded):
+        """英文片段对应的 id 集合：片段在关键词边缘时可能只是文本中某个词的一部分"""
+        if left_bounded and right_bounded:
+            return set(self.postings.get(fragment, ()))
+
+        if left_bounded:
+            # 片段位于关键词末尾：文本中的词以它开头
+            words = []
+            i = bisect_left(self.vocabulary, fragment)
+            while i < len(self.vocabulary) and self.vocabulary[i].startswith(fragment):
+                words.append(self.vocabulary[i])
+                i += 1
+        elif right_bounded:
+            words = [w for w in self.vocabulary if w.endswith(fragment)]
+        else:
+            words = [w for w in self.vocabulary if fragment in w]
+
+        ids = set()
+        for word in words:
+            ids.update(self.postings[word])
+        return ids
+
+    def candidates(self, keyword):
+        """
+        返回可能包含关键词（子串匹配，忽略大小写）的 id 集合
+
+        结果是精确匹配集合的超集，调用方仍需做子串校验。
+
+        Returns:
+            id 集合；关键词中没有可用词项（如纯标点）时返回 None，表示无法缩小范围
+        """
+        keyword = keyword.lower()
+        id_sets = []
+
+        for run in CJK_RUN.findall(keyword):
+            if len(run) == 1:
+                terms = [run]
+            else:
+                terms = {run[i:i + 2] for i in range(len(run) - 1)}
+            for term in terms:
+                id_sets.append(self.postings.get(term, ()))
+
+        for m in WORD_RUN.finditer(keyword):
+            left_bounded = m.start() > 0
+            right_bounded = m.end() < len(keyword)
+            id_sets.append(self._word_postings(m.group(), left_bounded, right_bounded))
+
+        if not id_sets:
+            return None
+
+        # 从最短的倒排表开始求交
+        id_sets.sort(key=len)
+        result = set(id_sets[0])
+        for ids in id_sets[1:]:
+            if not result:
+                break
+            result.intersection_update(ids)
+        return result
+
+    def bm25_scores(self, keyword, doc_ids):
+        """
+        计算候选文档对关键词的 BM25 分数
+
+        Args:
+            keyword: 查询关键词
+            doc_ids: 候选文档 id 集合
+
+        Returns:
+            {id: 分数}，未命中任何查询词项的候选分数为 0
+        """
+        n_docs = len(self.doc_lengths)
+        avg_len = self.avg_doc_length or 1.0
+        scores = dict.fromkeys(doc_ids, 0.0)
+
+        for term in query_terms(keyword):
+            ids = self.postings.get(term)
+            if not ids:
+                continue
+            df = len(ids)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in zip(ids, self.frequencies.get(term, ())):
+                if doc_id not in scores:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths.get(doc_id, avg_len) / avg_len)
+                scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+class MultiPatternMatcher:
+    """
+    多关键词子串匹配（忽略大小写），一次扫描找出文本中出现的全部关键词
+
+    用零宽前瞻的正则交替式逐位置尝试，交替项按长度降序排列，因此每个位置命中的是
+    该处最长的关键词；同一位置能命中的其余关键词必然是它的前缀，由预先计算的前缀
+    闭包补齐，重叠的关键词（如 "非谓语" 与 "谓语"）都能被找到。
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        lowered = {}
+        for i, pattern in enumerate(self.patterns):
+            if pattern:
+                lowered.setdefault(pattern.lower(), []).append(i)
+
+        # 每个关键词 -> 它自身及其所有前缀关键词对应的下标
+        self.closure = {
+            p: frozenset(i for q, idx in lowered.items() if p.startswith(q) for i in idx)
+            for p in lowered
+        }
+        alternatives = sorted(lowered, key=len, reverse=True)
+        self.regex = (
+            re.compile("(?=(" + "|".join(re.escape(p) for p in alternatives) + "))")
+            if alternatives else None
+        )
+
+    def find_all(self, text):
+        """
+        Returns:
+            出现在 text 中的关键词下标集合
+        """
+        found = set()
+        if self.regex is None:
+            return found
+        for m in self.regex.finditer(text.lower()):
+            found |= self.closure[m.group(1)]
+            if len(found) == len(self.patterns):
+                break
+        return found
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+TF-IDF Vector Index for Question Bank
+字符 n-gram 的 TF-IDF 向量索引（index_vectors.npz），按余弦相似度检索相关试卷
+
+关键词子串匹配只能找到字面包含查询的文件；向量检索按字符片段的重合程度打分，
+查询的部分片段命中（如 "定语从句" 与 "定语从句专练"、"从句" 相关的题目）也能排上来。
+
+矩阵按列压缩（CSC）保存为 data/indices/indptr 三个数组，可直接交给
+scipy.sparse.csc_matrix；查询只访问查询词项对应的列，全部用 NumPy 向量运算完成。
+依赖 NumPy（可选依赖，未安装时 VectorIndex.load 返回 None）。NumPy 在第一次写入或加载
+索引时才导入，import 本模块（以及 searcher）不承担它的导入开销。
+"""
+
+import os
+import re
+import json
+import math
+from collections import Counter
+
+# NumPy 模块，由 _numpy() 在第一次使用时导入
+np = None
+
+def _numpy():
+    """
+    按需导入 NumPy
+
+    Returns:
+        numpy 模块；未安装时返回 None
+    """
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+    return np
+
+FORMAT_VERSION = 1
+
+# 字符 n-gram 的长度范围
+NGRAM_MIN = 2
+NGRAM_MAX = 3
+
+SPACES = re.compile(r'\s+')
+
+def char_ngrams(text):
+    """
+    文本的字符 n-gram 计数（小写，连续空白压缩为一个空格）
+
+    Returns:
+        Counter：{n-gram: 出现次数}
+    """
+    text = SPACES.sub(" ", text.lower()).strip()
+    counts = Counter()
+    for n in range(NGRAM_MIN, NGRAM_MAX + 1):
+        counts.update(text[i:i + n] for i in range(len(text) - n + 1))
+    # 纯空格片段没有区分度
+    counts.pop(" " * NGRAM_MIN, None)
+    return counts
+
+def document_text(item, questions=None):
+    """参与向量化的文本：文件名 + 预览 + 已切分的题目"""
+    parts = [item.get("filename", ""), item.get("preview", "")]
+    if questions:
+        parts.extend(questions)
+    return "\n".join(parts)
+
+def _sublinear_tf(tf):
+    return 1.0 + math.log(tf)
+
+def write_vector_index(path, index_data, questions_by_id=None):
+    """
+    构建并保存 TF-IDF 向量索引
+
+    每个索引文件一行；questions_by_id 提供时把该文件的题目文本一并向量化。
+    权重为 (1 + log tf) × idf，idf = log((1 + N) / (1 + df)) + 1，每行 L2 归一化。
+
+    Args:
+        path: 输出文件路径（.npz）
+        index_data: 与 index.json 相同结构的索引数据
+        questions_by_id: 可选的 {文件 id: 题目文本列表}
+    """
+    if _numpy() is None:
+        raise ImportError("向量索引需要 NumPy，请先运行: pip install numpy")
+
+    files = index_data.get("files", [])
+    questions_by_id = questions_by_id or {}
+    rows = [char_ngrams(document_text(item, questions_by_id.get(item["id"]))) for item in files]
+
+    df = Counter()
+    for counts in rows:
+        df.update(counts.keys())
+    vocabulary = sorted(df)
+    term_ids = {term: i for i, term in enumerate(vocabulary)}
+    n_docs = len(files)
+    idf_values = [math.log((1 + n_docs) / (1 + df[term])) + 1.0 for term in vocabulary]
+
+    # 先按行算好归一化权重，再按列分桶得到 CSC
+    columns = [[] for _ in vocabulary]
+    for row, counts in enumerate(rows):
+        weights = [
+            (term_ids[term], _sublinear_tf(tf) * idf_values[term_ids[term]])
+            for term, tf in counts.items()
+        ]
+        norm = math.sqrt(sum(w * w for _, w in weights)) or 1.0
+        for term_id, w in weights:
+            columns[term_id].append((row, w / norm))
+
+    indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(col) for col in columns])
+    indices = np.fromiter((row for col in columns for row, _ in col), dtype=np.int32, count=int(indptr[-1]))
+    data = np.fromiter((w for col in columns for _, w in col), dtype=np.float32, count=int(indptr[-1]))
+
+    meta = {
+        "version": FORMAT_VERSION,
+        "index_created_at": index_data.get("metadata", {}).get("created_at"),
+        "ngram_range": [NGRAM_MIN, NGRAM_MAX],
+        "rows": n_docs,
+        "with_questions": bool(questions_by_id),
+    }
+
+    tmp_path = path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        meta=np.array(json.dumps(meta, ensure_ascii=False)),
+        ids=np.array([item["id"] for item in files], dtype=np.int64),
+        vocabulary=np.array(vocabulary, dtype=str),
+        idf=np.array(idf_values, dtype=np.float32),
+        data=data,
+        indices=indices,
+        indptr=indptr,
+    )
+    os.replace(tmp_path, path)
+
+class VectorIndex:
+    """TF-IDF 向量索引查询：余弦相似度 top-k"""
+
+    def __init__(self, ids, vocabulary, idf, data, indices, indptr):
+        self.ids = ids
+        self.term_ids = {term: i for i, term in enumerate(vocabulary.tolist())}
+        self.idf = idf
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self.tiebreak = None
+
+    @classmethod
+    def load(cls, path, index_metadata=None):
+        """
+        加载向量索引
+
+        Returns:
+            VectorIndex；未安装 NumPy、文件不存在、版本不符或与 index.json 不一致时返回 None
+        """
+        if not os.path.exists(path) or _numpy() is None:
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                meta = json.loads(str(npz["meta"]))
+                if meta.get("version") != FORMAT_VERSION:
+                    return None
+                if (index_metadata is not None
+                        and meta.get("index_created_at") != index_metadata.get("created_at")):
+                    return None
+                return cls(npz["ids"], npz["vocabulary"], npz["idf"],
+                           npz["data"], npz["indices"], npz["indptr"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set_tiebreak(self, values):
+        """设置相似度相同时的次序（与 self.ids 对齐的整数序列，取值小的在前）"""
+        self.tiebreak = np.asarray(values, dtype=np.int64)
+
+    def query_vector(self, text):
+        """
+        查询文本的 TF-IDF 向量（稀疏表示）
+
+        Returns:
+            (词项列下标数组, 归一化权重数组)；没有任何已知词项时两者为空
+        """
+        term_ids = []
+        weights = []
+        for term, tf in char_ngrams(text).items():
+            term_id = self.term_ids.get(term)
+            if term_id is not None:
+                term_ids.append(term_id)
+                weights.append(_sublinear_tf(tf) * float(self.idf[term_id]))
+        weights = np.array(weights, dtype=np.float32)
+        norm = np.linalg.norm(weights)
+        if norm > 0:
+            weights /= norm
+        return np.array(term_ids, dtype=np.int64), weights
+
+    def scores(self, text):
+        """
+        所有行与查询文本的余弦相似度
+
+        Returns:
+            float32 数组，与 self.ids 对齐
+        """
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term_id, weight in zip(*self.query_vector(text)):
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            # 同一列中的行号互不相同，可以直接按下标累加
+            scores[self.indices[start:end]] += weight * self.data[start:end]
+        return scores
+
+    def top_k(self, text, k=10, rows=None):
+        """
+        余弦相似度最高的 k 行（相似度相同时按 set_tiebreak 设置的次序，默认按行号）
+
+        Args:
+            text: 查询文本
+            k: 返回的行数
+            rows: 可选的行号集合，只在这些行中挑选
+
+        Returns:
+            [(行号, 相似度)]，按相似度降序；相似度为 0 的行不返回
+        """
+        if k <= 0:
+            return []
+        scores = self.scores(text)
+        if rows is not None:
+            allowed = np.zeros(len(scores), dtype=bool)
+            allowed[np.fromiter(rows, dtype=np.int64, count=len(rows))] = True
+            scores[~allowed] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            # 先用 partition 找到第 k 大的分数，只对不低于它的行排序
+            kth = np.partition(scores[candidates], len(candidates) - k)[len(candidates) - k]
+            candidates = candidates[scores[candidates] >= kth]
+        secondary = candidates if self.tiebreak is None else self.tiebreak[candidates]
+        order = candidates[np.lexsort((secondary, -scores[candidates]))][:k]
+        return [(int(row), float(scores[row])) for row in order]